@@ -0,0 +1,262 @@
+# bench.py
+# Offline benchmarks for the catalog, search, cart and render hot paths.
+# Needs no Discord connection or token: interactions are stubbed.
+#
+#   python bench.py                         # 100 / 1k / 10k / 100k items
+#   python bench.py --sizes 100,1000 --output before.json
+#   python bench.py --compare before.json   # print the change per benchmark
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import tempfile
+import time
+
+import bot
+
+CART_SIZES = (10, 100, 1000)
+QUERIES = ("ak", "m4a1", "ammo", "battery", "gas mask", "tent lrg", "vitamins/tetra", "zzqx")
+
+
+# -------------------------------
+# 🧪 SYNTHETIC DATA
+# -------------------------------
+def make_catalog(size, seed=0):
+    rng = random.Random(seed)
+    seeds = list(bot.DEFAULT_CATEGORIES)
+    data = {}
+    while len(data) < size:
+        base = rng.choice(seeds)
+        suffix = "".join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(rng.randint(0, 6)))
+        name = f"{base} {suffix}".strip() if len(data) >= len(seeds) else base
+        data[name] = {"buy": float(rng.randint(1, 400) * 50), "sell": float(rng.randint(0, 100) * 25)}
+    return data
+
+
+def make_cart(items, lines, seed=0):
+    rng = random.Random(seed)
+    names = rng.sample(sorted(items), min(lines, len(items)))
+    return {name: rng.randint(1, 50) for name in names}
+
+
+# -------------------------------
+# 🎭 STUBBED DISCORD OBJECTS
+# -------------------------------
+class StubUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.display_name = f"bench-{user_id}"
+
+
+class StubResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, *args, **kwargs):
+        self.sent.append(kwargs)
+
+    async def edit_message(self, *args, **kwargs):
+        self.sent.append(kwargs)
+
+    async def send_modal(self, modal):
+        self.sent.append({"modal": modal})
+
+
+class StubInteraction:
+    def __init__(self, user):
+        self.user = user
+        self.response = StubResponse()
+        self.message = None
+        self.guild_id = None
+
+
+# -------------------------------
+# ⏱️ TIMING
+# -------------------------------
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+    }
+
+
+def measure(func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def measure_async(func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+# -------------------------------
+# 🏁 BENCHMARKS
+# -------------------------------
+async def bench_size(size, repeat, workdir):
+    results = []
+
+    def record(name, stats, **params):
+        results.append({"name": name, "items": size, **params, **stats})
+        extra = " ".join(f"{key}={value}" for key, value in params.items())
+        print(f"{name:<28} items={size:<7} {extra:<16} median={stats['median_ms']:.3f} ms")
+
+    raw = make_catalog(size)
+    path = os.path.join(workdir, f"items-{size}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=4)
+
+    record("repair_items", measure(lambda: bot.repair_items(raw), repeat))
+    record("load_items.cold", measure(lambda: bot.Catalog(bot.JsonCatalogStore(path)).snapshot(), repeat))
+
+    bot.catalog = bot.Catalog(bot.JsonCatalogStore(path))
+    items = bot.load_items()
+    record("load_items.cached", measure(bot.load_items, repeat * 20))
+
+    record("search_index.build", measure(lambda: bot.SearchIndex(items), repeat))
+    index = bot.search_index(items)
+    record("find_item_matches", measure(lambda: [bot.find_item_matches(items, q) for q in QUERIES], repeat), queries=len(QUERIES))
+    record("autocomplete", measure(lambda: [index.complete(q) for q in QUERIES], repeat), queries=len(QUERIES))
+    record("build_categories", measure(lambda: bot.build_categories(items), repeat))
+
+    owner = StubUser(1)
+    for lines in CART_SIZES:
+        cart_data = make_cart(items, lines)
+
+        def fill_cart():
+            bot.sessions.clear_cart(owner.id)
+            for name, qty in cart_data.items():
+                bot.sessions.set_quantity(owner.id, name, qty, items)
+
+        fill_cart()
+        cart = bot.sessions.cart(owner.id)
+
+        def reprice():
+            cart.priced_version = None
+            bot.cart_stats(owner.id, items, "buy")
+
+        record("cart_stats.reprice", measure(reprice, repeat), cart_lines=lines)
+        record("cart_stats.running", measure(lambda: bot.cart_stats(owner.id, items, "buy"), repeat * 20), cart_lines=lines)
+
+        text_lines = [f"• **{name.title()} × {qty}** — $1,000.00 ea. → **$5,000.00**" for name, qty in cart_data.items()]
+        record("chunk_lines", measure(lambda: bot.chunk_lines(text_lines), repeat), cart_lines=lines)
+
+        main_view = bot.TotalView(owner)
+        main_view.mode = "buy"
+
+        def cold_cart_view():
+            bot.render_cache = bot.RenderCache()
+            bot.CartView(main_view)
+
+        record("CartView.render", measure(cold_cart_view, repeat), cart_lines=lines)
+
+        # Dispatched like a click on the persistent dashboard button.
+        calculate_button = bot.CalculatorButton("calculate", owner.id, "buy")
+
+        async def calculate():
+            await calculate_button.callback(StubInteraction(owner))
+
+        record("TotalView.calculate_total", await measure_async(calculate, repeat, setup=fill_cart), cart_lines=lines)
+
+    bot.sessions.clear_cart(owner.id)
+    main_view = bot.TotalView(owner)
+    main_view.mode = "buy"
+    names = bot.sorted_item_names(items)
+
+    def cold_browser():
+        bot.render_cache = bot.RenderCache()
+        bot.ItemBrowserView(main_view, names, "📖 Browse All Items", list_key="all")
+
+    record("ItemBrowserView.render", measure(cold_browser, repeat))
+    browser = bot.ItemBrowserView(main_view, names, "📖 Browse All Items", list_key="all")
+    record("ItemBrowserView.cached", measure(browser.update_view, repeat * 20))
+    record("TotalView.dashboard_embed", measure(main_view.create_dashboard_embed, repeat))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=bot.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(entry):
+        return tuple((k, v) for k, v in sorted(entry.items()) if not k.endswith("_ms") and k != "runs")
+
+    previous = {key(entry): entry for entry in baseline["results"]}
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('revision')}):")
+    for entry in results:
+        old = previous.get(key(entry))
+        if old is None or not old["median_ms"]:
+            continue
+        change = entry["median_ms"] / old["median_ms"]
+        flag = "  ⚠️ slower" if change > 1.2 else ""
+        print(f"{entry['name']:<28} items={entry['items']:<7} {old['median_ms']:.3f} -> {entry['median_ms']:.3f} ms (x{change:.2f}){flag}")
+
+
+async def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            results.extend(await bench_size(size, args.repeat, workdir))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the trader bot hot paths.")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
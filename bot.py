@@ -1,14 +1,36 @@
+import asyncio
+import atexit
+import bisect
+import contextlib
+import csv
 import difflib
+import functools
+import io
+import itertools
 import json
 import logging
+import math
 import os
-from threading import Thread
+import shutil
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 import discord
+from aiohttp import web
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
-from flask import Flask
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process catalog lock
+    fcntl = None
 
 # Enable logging to see full errors
 logging.basicConfig(level=logging.INFO)
@@ -17,23 +39,55 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ITEMS_FILE = os.path.join(BASE_DIR, "items.json")
 
 # -------------------------------
-# 🌐 KEEP ALIVE SERVER
+# 🌐 HEALTH SERVER
 # -------------------------------
-app = Flask(__name__)
+# Served by aiohttp inside the bot's own event loop (no extra thread). Set
+# HEALTH_SERVER=flask to use the old Flask keep_alive.py instead, or "off".
+async def home(request):
+    return web.Response(text="Bot is running!")
+
+
+async def healthz(request):
+    connected = bot.is_ready() and not bot.is_closed()
+    latency = bot.latency if math.isfinite(bot.latency) else None
+    return web.json_response(
+        {
+            "status": "ok" if connected else "unavailable",
+            "connected": connected,
+            "latency_ms": None if latency is None else round(latency * 1000, 1),
+            "shard_ids": getattr(bot, "shard_ids", None),
+        },
+        status=200 if connected else 503,
+    )
 
 
-@app.route("/")
-def home():
-    return "Bot is running!"
+async def readyz(request):
+    # Guild catalogs load on demand, so with GUILD_CATALOGS the bot is ready
+    # once setup has run; otherwise setup_hook loads the shared catalog first.
+    ready = bot.catalog_ready
+    body = {"status": "ok" if ready else "loading"}
+    if GUILD_CATALOGS:
+        body["guild_catalogs_loaded"] = len(guild_catalogs)
+    else:
+        body.update(catalog_items=len(catalog.items), catalog_version=catalog.version)
+    return web.json_response(body, status=200 if ready else 503)
 
 
-def run_keep_alive():
-    app.run(host="0.0.0.0", port=8080)
+async def metrics_endpoint(request):
+    return web.Response(text=metrics.render(), headers={"Content-Type": "text/plain; version=0.0.4"})
 
 
-def keep_alive():
-    t = Thread(target=run_keep_alive, daemon=True)
-    t.start()
+async def start_health_server():
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    app.router.add_get("/metrics", metrics_endpoint)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, HEALTH_HOST, PORT).start()
+    logging.info("Health server listening on %s:%s", HEALTH_HOST, PORT)
+    return runner
 
 
 # -------------------------------
@@ -43,66 +97,1333 @@ load_dotenv(os.path.join(BASE_DIR, ".env"))
 TOKEN = os.getenv("DISCORD_TOKEN")
 BOT_ROLE = os.getenv("BOT_ROLE")
 BOT_ROLE_ID = os.getenv("BOT_ROLE_ID")
+BOT_ROLE_OVERRIDES = os.getenv("BOT_ROLE_OVERRIDES")
+CATALOG_BACKEND = os.getenv("CATALOG_BACKEND", "json").lower()
+CATALOG_DB = os.getenv("CATALOG_DB", os.path.join(BASE_DIR, "items.db"))
+CATALOG_BACKUPS = int(os.getenv("CATALOG_BACKUPS", "3"))
+CATALOG_FLUSH_DELAY = float(os.getenv("CATALOG_FLUSH_DELAY", "1.0"))
+# One shop per guild: CATALOG_DIR/<guild id>.json (or .db), seeded from items.json.
+GUILD_CATALOGS = os.getenv("GUILD_CATALOGS", "").lower() in {"1", "true", "yes", "on"}
+CATALOG_DIR = os.getenv("CATALOG_DIR", os.path.join(BASE_DIR, "catalogs"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "32"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "5000"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "900"))
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+SESSION_DB = os.getenv("SESSION_DB", os.path.join(BASE_DIR, "sessions.db"))
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "2.0"))
+SESSION_PERSIST_TTL = float(os.getenv("SESSION_PERSIST_TTL", str(7 * 24 * 3600)))
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "512"))
+EDIT_COALESCE_WINDOW = float(os.getenv("EDIT_COALESCE_WINDOW", "0.75"))
+EDIT_RATE = int(os.getenv("EDIT_RATE", "5"))
+EDIT_RATE_PER = float(os.getenv("EDIT_RATE_PER", "5.0"))
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "4"))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+# Sharding: SHARDED=1 lets discord.py pick the shard count; SHARD_COUNT and
+# SHARD_IDS pin it (launcher.py sets them for each worker process).
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(shard) for shard in os.getenv("SHARD_IDS", "").split(",") if shard.strip()] or None
+SHARDED = os.getenv("SHARDED", "").lower() in {"1", "true", "yes", "on"} or SHARD_COUNT is not None
+# Lean mode: no privileged intents, no member cache or chunking. Interactions
+# carry the member and roles we need; use /sync (or @bot sync) instead of !sync.
+LEAN_MODE = os.getenv("LEAN_MODE", "").lower() in {"1", "true", "yes", "on"}
+HEALTH_SERVER = os.getenv("HEALTH_SERVER", "aiohttp").lower()
+HEALTH_HOST = os.getenv("HEALTH_HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8080"))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(2_000_000)))
 
 # -------------------------------
 # 🤖 DISCORD SETUP
 # -------------------------------
 intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
+intents.message_content = not LEAN_MODE
+intents.members = not LEAN_MODE
 intents.guilds = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+class TraderBot(commands.AutoShardedBot if SHARDED else commands.Bot):
+    health_runner = None
+    catalog_ready = False
+
+    @property
+    def syncs_commands(self):
+        # Only one process syncs the command tree: the one running shard 0.
+        shard_ids = getattr(self, "shard_ids", None)
+        return not shard_ids or 0 in shard_ids
+
+    async def setup_hook(self):
+        self.add_dynamic_items(CalculatorButton)
+        loop_monitor.start()
+        if not GUILD_CATALOGS:
+            await catalog.refresh()
+        self.catalog_ready = True
+        if HEALTH_SERVER == "aiohttp":
+            self.health_runner = await start_health_server()
+
+    async def close(self):
+        await super().close()
+        if self.health_runner is not None:
+            await self.health_runner.cleanup()
+        loop_monitor.stop()
+        await run_storage(flush_catalogs)
+
+
+shard_options = {"shard_count": SHARD_COUNT, "shard_ids": SHARD_IDS} if SHARDED else {}
+if LEAN_MODE:
+    lean_options = {
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": None,
+    }
+    # Without message content, only messages that mention the bot have text.
+    bot = TraderBot(command_prefix=commands.when_mentioned, intents=intents, **lean_options, **shard_options)
+else:
+    bot = TraderBot(command_prefix="!", intents=intents, **shard_options)
 
 # -------------------------------
 # 🔐 ROLE CHECK
 # -------------------------------
+def split_roles(values):
+    """Role entries -> (frozenset of IDs, frozenset of lowercased names)."""
+    ids, names = set(), set()
+    for value in values:
+        value = str(value).strip()
+        if value.isdigit():
+            ids.add(int(value))
+        elif value:
+            names.add(value.lower())
+    return frozenset(ids), frozenset(names)
+
+
+class RolePolicy:
+    """Which roles may use the admin commands, resolved to role IDs per guild.
+
+    BOT_ROLE_ID and BOT_ROLE take comma-separated IDs and names;
+    BOT_ROLE_OVERRIDES is JSON mapping a guild ID to its own list of IDs and/or
+    names. Names are looked up once per guild and cached as a frozenset of IDs,
+    so a check is a hash lookup per allowed role on the member. The cache is
+    dropped when the guild's roles change.
+    """
+
+    def __init__(self, role_ids="", role_names="", overrides=None):
+        self.default = split_roles(f"{role_ids or ''},{role_names or ''}".split(","))
+        self.overrides = {int(guild_id): split_roles(values) for guild_id, values in (overrides or {}).items()}
+        self._allowed = {}
+
+    def rules_for(self, guild_id):
+        return self.overrides.get(guild_id, self.default)
+
+    def allowed_ids(self, guild):
+        allowed = self._allowed.get(guild.id)
+        if allowed is None:
+            ids, names = self.rules_for(guild.id)
+            if names:
+                ids = ids | {role.id for role in guild.roles if role.name.lower() in names}
+            allowed = self._allowed[guild.id] = frozenset(ids)
+        return allowed
+
+    def allows(self, member) -> bool:
+        guild = getattr(member, "guild", None)
+        if guild is None:
+            return False
+        # get_role() looks the ID up directly; member.roles would build and sort every Role.
+        return any(member.get_role(role_id) is not None for role_id in self.allowed_ids(guild))
+
+    def invalidate(self, guild_id):
+        self._allowed.pop(guild_id, None)
+
+
+role_policy = RolePolicy(BOT_ROLE_ID, BOT_ROLE, json.loads(BOT_ROLE_OVERRIDES) if BOT_ROLE_OVERRIDES else None)
+
+
 def has_bot_role(member: discord.Member) -> bool:
-    if BOT_ROLE_ID and any(role.id == int(BOT_ROLE_ID) for role in member.roles):
-        return True
-    if BOT_ROLE and any(role.name.lower() == BOT_ROLE.lower() for role in member.roles):
+    return role_policy.allows(member)
+
+
+def bot_role_required():
+    """app_commands check: only members with one of the bot roles may run the command."""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if not has_bot_role(interaction.user):
+            raise app_commands.CheckFailure("missing bot role")
         return True
-    return False
+    return app_commands.check(predicate)
+
+
+@bot.event
+async def on_guild_role_create(role):
+    role_policy.invalidate(role.guild.id)
+
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.name != after.name:
+        role_policy.invalidate(after.guild.id)
+
+
+@bot.event
+async def on_guild_role_delete(role):
+    role_policy.invalidate(role.guild.id)
+
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    if isinstance(error, app_commands.CheckFailure):
+        message = "❌ You don't have permission to use this command."
+    else:
+        logging.error("Command %s failed", getattr(interaction.command, "name", "?"), exc_info=error)
+        message = "⚠️ Something went wrong running that command."
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
 
 
 # -------------------------------
-# 📦 JSON HELPERS
+# 📈 METRICS
 # -------------------------------
-def load_items():
-    try:
-        with open(ITEMS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return repair_items(data)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(ITEMS_FILE, "w", encoding="utf-8") as f:
-            json.dump({}, f, indent=4)
-        return {}
+class Metrics:
+    """Minimal Prometheus-style registry rendered as text on /metrics."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 3.0, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._gauges = []
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.BUCKETS), 0.0, 0]
+            for index, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def gauge(self, name, text, read):
+        """Register a gauge whose value is read by calling `read()` at scrape time."""
+        self.describe(name, "gauge", text)
+        self._gauges.append((name, read))
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (
+            key + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for key, value in pairs
+        )
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+
+        samples = defaultdict(list)
+        for (name, labels), value in counters.items():
+            samples[name].append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), (buckets, total, count) in histograms.items():
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                samples[name].append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {bucket_count}")
+            samples[name].append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {count}")
+            samples[name].append(f"{name}_sum{self._labels(labels)} {total:g}")
+            samples[name].append(f"{name}_count{self._labels(labels)} {count}")
+        for name, read in self._gauges:
+            try:
+                samples[name].append(f"{name} {float(read()):g}")
+            except Exception:
+                logging.exception("Failed to read gauge %s", name)
+
+        lines = []
+        for name in sorted(samples):
+            kind, text = self._help.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("trader_command_seconds", "histogram", "Slash command handler latency.")
+metrics.describe("trader_view_callback_seconds", "histogram", "Button, select and modal callback latency.")
+metrics.describe("trader_autocomplete_seconds", "histogram", "Item name autocomplete latency.")
+metrics.describe("trader_handler_errors_total", "counter", "Handlers that raised.")
+metrics.describe("trader_catalog_loads_total", "counter", "Catalog reads from the store.")
+metrics.describe("trader_catalog_saves_total", "counter", "Catalog writes to the store.")
+metrics.describe("trader_search_queries_total", "counter", "find_item_matches() calls.")
+metrics.describe("trader_exact_lookups_total", "counter", "Queries resolved by exact name or alias.")
+metrics.describe("trader_discord_http_429_total", "counter", "HTTP 429 responses reported by discord.py.")
+
+
+def timed(metric, **labels):
+    """Record the wrapped coroutine's run time in histogram `metric`."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                metrics.inc("trader_handler_errors_total", handler=func.__qualname__)
+                raise
+            finally:
+                metrics.observe(metric, time.perf_counter() - started, **labels)
+        return wrapper
+    return decorator
+
 
+class RateLimitCounter(logging.Handler):
+    """Counts the 429 warnings discord.py logs while it retries rate-limited requests.
 
-def save_items(data):
-    with open(ITEMS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    Each logger writes exactly one matching line per 429. discord.http adds a
+    second "Global rate limit" line for global limits, and that line is not
+    counted.
+    """
 
+    markers = {
+        "discord.http": "responded with 429",
+        "discord.webhook.async_": "is rate limited",
+    }
 
+    def emit(self, record):
+        marker = self.markers.get(record.name)
+        if marker and record.levelno >= logging.WARNING and marker in record.getMessage():
+            metrics.inc("trader_discord_http_429_total")
+
+
+rate_limit_counter = RateLimitCounter()
+for logger_name in RateLimitCounter.markers:
+    logging.getLogger(logger_name).addHandler(rate_limit_counter)
+
+
+# -------------------------------
+# 🧵 STORAGE EXECUTOR
+# -------------------------------
+# Every file and database call made on behalf of a handler runs here, so a slow
+# disk never holds up the event loop (and every other interaction's deadline).
+storage_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+
+
+async def run_storage(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(storage_executor, functools.partial(func, *args))
+
+
+# -------------------------------
+# ⏱️ EVENT LOOP MONITOR
+# -------------------------------
+class LoopLagMonitor:
+    """Measures event-loop lag and names whatever is blocking the loop.
+
+    A coroutine wakes every `interval` seconds and records how late it woke. A
+    watchdog thread checks that heartbeat; when the loop has not ticked for
+    `threshold` seconds past its interval it logs the loop thread's current
+    stack, which points straight at the blocking callback.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL, threshold=LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _tick(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self.last_lag = max(0.0, self._heartbeat - started - self.interval)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            if self.last_lag > self.threshold:
+                logging.warning("Event loop lagged %.0f ms", self.last_lag * 1000)
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled <= self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+            logging.warning("Event loop blocked for %.0f ms so far, currently running:\n%s", stalled * 1000, stack)
+
+
+loop_monitor = LoopLagMonitor()
+
+
+# -------------------------------
+# 📦 JSON HELPERS
+# -------------------------------
 def repair_items(data):
     fixed = {}
     for k, v in data.items():
+        category = None
+        aliases = None
         if isinstance(v, dict):
             buy = v.get("buy", 0)
             sell = v.get("sell", 0)
+            category = v.get("category")
+            aliases = v.get("aliases")
         else:
             buy = v
             sell = 0
-        fixed[k.lower()] = {"buy": float(buy), "sell": float(sell)}
+        name = k.lower()
+        fixed[name] = {
+            "buy": float(buy),
+            "sell": float(sell),
+            "category": normalize_category(category, name),
+            "aliases": normalize_aliases(aliases, name),
+        }
     return fixed
 
 
+# -------------------------------
+# 🗃️ CATALOG CACHE
+# -------------------------------
+# Versions are unique across every Catalog instance, so a version number alone
+# identifies one snapshot.
+_catalog_versions = itertools.count(1)
+
+
+class CatalogSnapshot(dict):
+    """One version of the catalog. Read-only: Catalog swaps in a new snapshot on change."""
+
+    def __init__(self, data=(), version=0):
+        super().__init__(data)
+        self.version = version
+        self._derived = {}
+        self._build_lock = threading.RLock()
+        # For edits: the version this snapshot was made from and the old entries
+        # (None when absent) of the names that changed, so carts can re-price
+        # just those lines.
+        self.base_version = None
+        self.previous = {}
+
+    def derived(self, key, build):
+        # Indexes built from this snapshot live and die with it. Builds run on
+        # the storage executor; the lock keeps two threads from building one twice.
+        value = self._derived.get(key)
+        if value is None:
+            with self._build_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = self._derived[key] = build(self)
+        return value
+
+    def inherit_indexes(self, previous, changed):
+        """Reuse the indexes of `previous` that edits to `changed` cannot affect."""
+        if any((name in previous) != (name in self) for name in changed):
+            return
+        # Same names in the same order: name indexes still hold.
+        keys = ["sorted"]
+        if all(previous[name]["aliases"] == self[name]["aliases"] for name in changed if name in self):
+            keys.append("search")
+        if all(previous[name]["category"] == self[name]["category"] for name in changed if name in self):
+            keys.append("categories")
+        for key in keys:
+            if key in previous._derived:
+                self._derived[key] = previous._derived[key]
+
+
+class JsonCatalogStore:
+    """items.json on disk: atomic temp file -> fsync -> rename writes with rotated backups.
+
+    A missing file with no usable backup starts from `import_path` if given.
+    """
+
+    def __init__(self, path, backups=CATALOG_BACKUPS, import_path=None):
+        self.path = path
+        self.backups = backups
+        self.import_path = import_path
+
+    def __str__(self):
+        return self.path
+
+    def signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def backup_path(self, index):
+        return f"{self.path}.bak.{index}"
+
+    def _read(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return repair_items(json.load(f))
+
+    def _recover(self):
+        for index in range(1, self.backups + 1):
+            try:
+                data = self._read(self.backup_path(index))
+            except FileNotFoundError:
+                continue
+            except (ValueError, TypeError, AttributeError):
+                logging.exception("Catalog backup %s is unreadable", self.backup_path(index))
+                continue
+            logging.warning("Restored %d catalog items from %s", len(data), self.backup_path(index))
+            return data
+        if self.import_path is not None:
+            try:
+                data = self._read(self.import_path)
+            except FileNotFoundError:
+                return None
+            logging.info("Seeded %s with %d catalog items from %s", self.path, len(data), self.import_path)
+            return data
+        return None
+
+    def load(self):
+        """Return (items, needs_write); needs_write is set when the file had to be recovered."""
+        try:
+            return self._read(self.path), False
+        except FileNotFoundError:
+            return self._recover() or {}, True
+        except (ValueError, TypeError, AttributeError):
+            # Never replace a damaged file with an empty shop: park it for
+            # inspection and fall back to the newest readable backup.
+            corrupt_path = f"{self.path}.corrupt-{int(time.time())}"
+            logging.exception("%s is corrupt, moved it to %s", self.path, corrupt_path)
+            os.replace(self.path, corrupt_path)
+            return self._recover() or {}, True
+
+    def _rotate_backups(self):
+        if self.backups <= 0 or not os.path.exists(self.path):
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(self.backup_path(index)):
+                os.replace(self.backup_path(index), self.backup_path(index + 1))
+        try:
+            os.link(self.path, self.backup_path(1))
+        except OSError:
+            shutil.copy2(self.path, self.backup_path(1))
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Serialises writers across processes (sharded workers share the file).
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(self, items, changed=None, based_on=None):
+        """Rewrite the file; returns True if edits from another process were merged in.
+
+        `based_on` is the signature of the file `items` was loaded from. If the
+        file has changed since, only the `changed` names are applied on top of
+        what is on disk, so concurrent writers don't undo each other.
+        """
+        with self._locked():
+            merged = False
+            if changed is not None and based_on is not None and self.signature() != based_on:
+                try:
+                    on_disk = self._read(self.path)
+                except (FileNotFoundError, ValueError, TypeError, AttributeError):
+                    on_disk = None
+                if on_disk is not None:
+                    for name in changed:
+                        if name in items:
+                            on_disk[name] = items[name]
+                        else:
+                            on_disk.pop(name, None)
+                    items, merged = on_disk, True
+            self._write_file(items)
+        return merged
+
+    def _write_file(self, items):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(items, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        self._rotate_backups()
+        os.replace(tmp_path, self.path)
+        try:
+            dir_fd = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+
+class SQLiteCatalogStore:
+    """Catalog rows in SQLite, keyed and indexed by name with an indexed category.
+
+    Single-item edits become one upsert or delete instead of a full rewrite. An
+    empty database is seeded once from `import_path` (normally items.json).
+    """
+
+    def __init__(self, path, import_path=None):
+        self.path = path
+        self.import_path = import_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "name TEXT PRIMARY KEY, buy REAL NOT NULL, sell REAL NOT NULL, category TEXT NOT NULL, aliases TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(items)")}
+            if "aliases" not in columns:
+                # NULL aliases are seeded from DEFAULT_ALIASES on load.
+                self._conn.execute("ALTER TABLE items ADD COLUMN aliases TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_category ON items (category)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def __str__(self):
+        return self.path
+
+    def signature(self):
+        # data_version changes whenever another connection (or process) commits.
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _import_once(self):
+        if self.import_path is None:
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'imported_from'").fetchone():
+                return
+        try:
+            with open(self.import_path, "r", encoding="utf-8") as f:
+                data = repair_items(json.load(f))
+        except FileNotFoundError:
+            data = {}
+        self.write(data)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_from', ?)", (self.import_path,))
+        logging.info("Imported %d catalog items from %s into %s", len(data), self.import_path, self.path)
+
+    def load(self):
+        self._import_once()
+        with self._lock:
+            rows = self._conn.execute("SELECT name, buy, sell, category, aliases FROM items").fetchall()
+        data = {
+            name: {"buy": buy, "sell": sell, "category": category, "aliases": None if aliases is None else json.loads(aliases)}
+            for name, buy, sell, category, aliases in rows
+        }
+        return repair_items(data), False
+
+    def write(self, items, changed=None, based_on=None):
+        # Rows are written individually, so concurrent processes never need a merge.
+        upsert = (
+            "INSERT INTO items (name, buy, sell, category, aliases) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET buy = excluded.buy, sell = excluded.sell, "
+            "category = excluded.category, aliases = excluded.aliases"
+        )
+        with self._lock, self._conn:
+            if changed is None:
+                self._conn.execute("DELETE FROM items")
+                names = list(items)
+            else:
+                names = list(changed)
+                self._conn.executemany(
+                    "DELETE FROM items WHERE name = ?", [(name,) for name in names if name not in items]
+                )
+            self._conn.executemany(
+                upsert,
+                [
+                    (name, items[name]["buy"], items[name]["sell"], items[name]["category"], json.dumps(items[name]["aliases"]))
+                    for name in names if name in items
+                ],
+            )
+
+
+class Catalog:
+    """Process-wide catalog cache.
+
+    The store is read once and kept in memory. `snapshot()` only checks the
+    store's signature (items.json's inode/mtime/size, or SQLite's data_version)
+    and reloads when someone else changed it; the admin commands swap in a new
+    snapshot directly.
+
+    Changes are written back off the event loop: a burst of edits within
+    CATALOG_FLUSH_DELAY seconds becomes one store write covering just the names
+    that changed.
+    """
+
+    def __init__(self, store, flush_delay=CATALOG_FLUSH_DELAY):
+        self.store = store
+        self.flush_delay = flush_delay
+        self.items = CatalogSnapshot()
+        self.version = 0
+        self.loaded = False
+        self._signature = None
+        self._written_version = 0
+        # Names touched since the last flush; None means "write everything".
+        self._changed = set()
+        self._flush_task = None
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+
+    def _publish(self, data):
+        self.version = next(_catalog_versions)
+        self.items = CatalogSnapshot(data, self.version)
+        return self.items
+
+    @property
+    def dirty(self):
+        return self._written_version < self.version
+
+    def reload(self):
+        with self._lock:
+            if self.loaded and self.dirty:
+                # An edit landed since snapshot() checked; its flush merges the
+                # store's changes, and the next snapshot() reloads after that.
+                return self.items
+            data, needs_write = self.store.load()
+            metrics.inc("trader_catalog_loads_total")
+            self.loaded = True
+            items = self._publish(data)
+            if needs_write:
+                self._changed = None
+            else:
+                self._signature = self.store.signature()
+                self._written_version = items.version
+        logging.info("Loaded %d catalog items from %s", len(items), self.store)
+        if needs_write:
+            self.flush()
+        return items
+
+    def snapshot(self):
+        if not self.loaded:
+            return self.reload()
+        if not self.dirty and self.store.signature() != self._signature:
+            return self.reload()
+        return self.items
+
+    def current(self):
+        """The in-memory snapshot, without checking the store. Safe on the event loop."""
+        return self.items if self.loaded else self.snapshot()
+
+    async def refresh(self):
+        return await run_storage(self._snapshot_indexed)
+
+    def _snapshot_indexed(self):
+        # Runs on the storage executor, so handlers only ever see built indexes.
+        items = self.snapshot()
+        warm_indexes(items)
+        return items
+
+    def _warm_later(self, items):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(run_storage(warm_indexes, items))
+
+    def _commit(self, data, changed):
+        # Callers hold self._lock; the flush is scheduled after they release it.
+        items = self._publish(data)
+        if changed is None or self._changed is None:
+            self._changed = None
+        else:
+            self._changed.update(changed)
+        return items
+
+    def replace(self, data):
+        with self._lock:
+            items = self._commit(repair_items(data), None)
+        self._schedule_flush()
+        self._warm_later(items)
+        return items
+
+    def update_items(self, updates=None, removed=()):
+        """Apply many upserts and removals as one snapshot and one store write."""
+        updates = repair_items(updates or {})
+        removed = {name.lower() for name in removed}
+        changed = set(updates) | removed
+        with self._lock:
+            previous = self.current()
+            data = dict(previous)
+            for name in removed:
+                data.pop(name, None)
+            data.update(updates)
+            items = self._commit(data, changed)
+            items.base_version = previous.version
+            items.previous = {name: previous.get(name) for name in changed}
+            items.inherit_indexes(previous, changed)
+        self._schedule_flush()
+        self._warm_later(items)
+        return items
+
+    def set_item(self, name, buy, sell, category=None, aliases=None):
+        return self.update_items({name: {"buy": buy, "sell": sell, "category": category, "aliases": aliases}})
+
+    def remove_item(self, name):
+        return self.update_items(removed=[name])
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_delay)
+        finally:
+            self._flush_task = None
+        await run_storage(self.flush)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                items = self.items
+                if items.version <= self._written_version:
+                    return
+                changed, self._changed = self._changed, set()
+            try:
+                merged = self.store.write(items, changed, self._signature)
+                metrics.inc("trader_catalog_saves_total")
+            except Exception:
+                with self._lock:
+                    if self._changed is not None:
+                        self._changed = None if changed is None else self._changed | changed
+                raise
+            self._written_version = items.version
+            # After merging someone else's edits the file is newer than our
+            # snapshot; a cleared signature makes the next snapshot() reload it.
+            self._signature = None if merged else self.store.signature()
+
+
+def make_catalog_store(guild_id=None):
+    if guild_id is not None:
+        os.makedirs(CATALOG_DIR, exist_ok=True)
+        if CATALOG_BACKEND == "sqlite":
+            return SQLiteCatalogStore(os.path.join(CATALOG_DIR, f"{guild_id}.db"), import_path=ITEMS_FILE)
+        return JsonCatalogStore(os.path.join(CATALOG_DIR, f"{guild_id}.json"), import_path=ITEMS_FILE)
+    if CATALOG_BACKEND == "sqlite":
+        return SQLiteCatalogStore(CATALOG_DB, import_path=ITEMS_FILE)
+    if CATALOG_BACKEND != "json":
+        logging.warning("Unknown CATALOG_BACKEND %r, using %s", CATALOG_BACKEND, ITEMS_FILE)
+    return JsonCatalogStore(ITEMS_FILE)
+
+
+class CatalogRegistry:
+    """Per-guild catalogs, each with its own snapshot, version and search index.
+
+    At most `max_loaded` guild catalogs stay in memory; the least recently used
+    one is dropped (after writing out any pending edits) and loaded again from
+    its store the next time that guild needs it.
+    """
+
+    def __init__(self, max_loaded=CATALOG_CACHE_SIZE):
+        self.max_loaded = max_loaded
+        self.evicted = 0
+        self._catalogs = OrderedDict()
+
+    def __len__(self):
+        return len(self._catalogs)
+
+    def get(self, guild_id):
+        guild_catalog = self._catalogs.get(guild_id)
+        if guild_catalog is not None:
+            self._catalogs.move_to_end(guild_id)
+            return guild_catalog
+        return self._add(guild_id, make_catalog_store(guild_id))
+
+    def peek(self, guild_id):
+        """The guild's catalog if it is in memory, without opening its store."""
+        guild_catalog = self._catalogs.get(guild_id)
+        if guild_catalog is not None:
+            self._catalogs.move_to_end(guild_id)
+        return guild_catalog
+
+    async def get_async(self, guild_id):
+        """Like get(), but opens a new guild's store (mkdir, SQLite setup) off the event loop."""
+        if guild_id not in self._catalogs:
+            store = await run_storage(make_catalog_store, guild_id)
+            # Another interaction may have added the guild while we waited.
+            if guild_id not in self._catalogs:
+                self._add(guild_id, store)
+        return self.get(guild_id)
+
+    def _add(self, guild_id, store):
+        guild_catalog = self._catalogs[guild_id] = Catalog(store)
+        while len(self._catalogs) > self.max_loaded:
+            _, evicted = self._catalogs.popitem(last=False)
+            self.evicted += 1
+            self._retire(evicted)
+        return guild_catalog
+
+    def _retire(self, evicted):
+        if not evicted.dirty:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            evicted.flush()
+            return
+        loop.create_task(run_storage(evicted.flush))
+
+    def flush(self):
+        for guild_catalog in list(self._catalogs.values()):
+            guild_catalog.flush()
+
+
+catalog = Catalog(make_catalog_store())
+guild_catalogs = CatalogRegistry()
+
+
+def catalog_for(guild_id=None):
+    if not GUILD_CATALOGS or guild_id is None:
+        return catalog
+    return guild_catalogs.get(guild_id)
+
+
+async def catalog_for_async(guild_id=None):
+    if not GUILD_CATALOGS or guild_id is None:
+        return catalog
+    return await guild_catalogs.get_async(guild_id)
+
+
+def flush_catalogs():
+    catalog.flush()
+    guild_catalogs.flush()
+
+
+# Write out edits that are still waiting for their coalesced flush.
+atexit.register(flush_catalogs)
+
+
+def load_items(guild_id=None):
+    return catalog_for(guild_id).snapshot()
+
+
+def current_items(guild_id=None):
+    """The in-memory snapshot for view code on the event loop. Never reads the store."""
+    loaded = catalog if not GUILD_CATALOGS or guild_id is None else guild_catalogs.peek(guild_id)
+    if loaded is None or not loaded.loaded:
+        raise RuntimeError(f"catalog for guild {guild_id} is not loaded; await load_items_async() first")
+    return loaded.items
+
+
+async def load_items_async(guild_id=None):
+    return await (await catalog_for_async(guild_id)).refresh()
+
+
+def save_items(data, guild_id=None):
+    catalog_for(guild_id).replace(data)
+
+
 # -------------------------------
 # 🧾 CALCULATOR DATA
 # -------------------------------
-# user_id: {item_name: integer_quantity}
-user_selected_items = {}
-# user_id: "buy" or "sell"
-user_calc_mode = {}
+# Cart versions are unique across all carts, so (owner, version) never repeats
+# even after a session is dropped and recreated.
+_cart_versions = itertools.count(1)
+
+
+class Cart:
+    """Item quantities with running line, unit and buy/sell totals.
+
+    Totals are kept priced against one catalog version and adjusted per line as
+    quantities change; only a new catalog version triggers a full re-price.
+    """
+
+    __slots__ = ("lines", "units", "totals", "priced_version", "version")
+
+    def __init__(self, lines=None):
+        # item_name: integer_quantity
+        self.lines = dict(lines or {})
+        self.units = sum(self.lines.values())
+        self.totals = {}
+        self.priced_version = None
+        self.version = next(_cart_versions)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __contains__(self, name):
+        return name in self.lines
+
+    def __getitem__(self, name):
+        return self.lines[name]
+
+    def get(self, name, default=None):
+        return self.lines.get(name, default)
+
+    def keys(self):
+        return self.lines.keys()
+
+    def items(self):
+        return self.lines.items()
+
+    def reprice(self, items):
+        totals = {mode: 0.0 for mode in MODE_INFO}
+        for name, qty in self.lines.items():
+            data = items.get(name)
+            if data:
+                for mode in totals:
+                    totals[mode] += price_for_mode(data, mode) * qty
+        self.totals = totals
+        self.priced_version = getattr(items, "version", None)
+
+    def set(self, name, qty, items=None):
+        self.set_many({name: qty}, items)
+
+    def set_many(self, quantities, items=None):
+        """Apply several line changes as one cart update (one version bump)."""
+        version = getattr(items, "version", None)
+        running = version is not None and version == self.priced_version
+        for name, qty in quantities.items():
+            old_qty = self.lines.get(name, 0)
+            if qty:
+                self.lines[name] = qty
+            else:
+                self.lines.pop(name, None)
+            self.units += qty - old_qty
+            data = items.get(name) if running else None
+            if data:
+                for mode in self.totals:
+                    self.totals[mode] += price_for_mode(data, mode) * (qty - old_qty)
+        self.version = next(_cart_versions)
+
+        if not self.lines:
+            self.totals = {mode: 0.0 for mode in MODE_INFO}
+            self.priced_version = version
+        elif not running:
+            self.priced_version = None
+
+    def reprice_changes(self, items):
+        """Move totals forward one catalog edit by re-pricing only the lines it touched."""
+        for name, old in items.previous.items():
+            qty = self.lines.get(name)
+            if not qty:
+                continue
+            new = items.get(name)
+            for mode in self.totals:
+                old_price = price_for_mode(old, mode) if old else 0.0
+                new_price = price_for_mode(new, mode) if new else 0.0
+                self.totals[mode] += (new_price - old_price) * qty
+        self.priced_version = items.version
+
+    def stats(self, items, mode=None):
+        total = 0.0
+        if mode in MODE_INFO:
+            version = getattr(items, "version", None)
+            if self.priced_version is None or self.priced_version != version:
+                if self.priced_version is not None and self.priced_version == getattr(items, "base_version", None):
+                    self.reprice_changes(items)
+                else:
+                    self.reprice(items)
+            total = self.totals[mode]
+        return len(self.lines), self.units, total
+
+
+# Shared read-only cart handed out for users without a session.
+EMPTY_CART = Cart()
+
+
+class Session:
+    __slots__ = ("cart", "mode", "last_seen")
+
+    def __init__(self):
+        self.cart = Cart()
+        # "buy", "sell" or None
+        self.mode = None
+        self.last_seen = time.monotonic()
+
+
+class MemorySessionBackend:
+    """Default: sessions live only in the process and are gone after a restart."""
+
+    blocking = False
+
+    def load(self, key):
+        return None
+
+    def save(self, key, session):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionBackend:
+    """Keeps carts in SQLite (WAL mode) so they survive restarts.
+
+    Writes are write-behind: save() only records the latest state per session in
+    memory, and a background thread commits everything pending every
+    `flush_interval` seconds in one transaction. Reads on a session that was
+    never saved are answered from an in-memory key set without touching disk.
+    """
+
+    blocking = True
+
+    def __init__(self, path, flush_interval=SESSION_FLUSH_INTERVAL, keep_for=SESSION_PERSIST_TTL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._reader = self._connect()
+        with self._reader:
+            self._reader.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_key TEXT PRIMARY KEY, mode TEXT, cart TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._reader.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - keep_for,))
+        self._known = {row[0] for row in self._reader.execute("SELECT session_key FROM sessions")}
+
+        self._writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self, key):
+        key = str(key)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+        if key not in self._known:
+            return None
+        with self._read_lock:
+            row = self._reader.execute("SELECT mode, cart FROM sessions WHERE session_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def save(self, key, session):
+        key = str(key)
+        with self._lock:
+            self._pending[key] = (session.mode, dict(session.cart))
+        self._known.add(key)
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._write_pending(conn)
+            self._write_pending(conn)
+        finally:
+            conn.close()
+
+    def _write_pending(self, conn):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        now = time.time()
+        rows = [(key, mode, json.dumps(cart), now) for key, (mode, cart) in pending.items()]
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO sessions (session_key, mode, cart, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(session_key) DO UPDATE SET mode = excluded.mode, cart = excluded.cart, "
+                    "updated_at = excluded.updated_at",
+                    rows,
+                )
+        except sqlite3.Error:
+            logging.exception("Failed to persist %d session(s); will retry", len(rows))
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending.setdefault(key, value)
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+        self._reader.close()
+
+
+def make_session_backend():
+    if SESSION_BACKEND == "sqlite":
+        return SQLiteSessionBackend(SESSION_DB)
+    if SESSION_BACKEND != "memory":
+        logging.warning("Unknown SESSION_BACKEND %r, keeping sessions in memory", SESSION_BACKEND)
+    return MemorySessionBackend()
+
+
+class SessionStore:
+    """Calculator state per user: their cart and buy/sell mode.
+
+    Holds at most `max_sessions` entries (least recently used goes first), and a
+    session nobody has touched for `ttl` seconds is dropped, same as the
+    calculator buttons timing out. With a persistent backend this is only a
+    cache: dropped sessions are loaded back from the backend on next use.
+    """
+
+    def __init__(self, backend=None, max_sessions=SESSION_MAX, ttl=SESSION_TTL):
+        self.backend = backend or MemorySessionBackend()
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evicted = 0
+        self.expired = 0
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _purge(self, now):
+        # Sessions are kept in last-used order, so the stale ones are up front.
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.ttl:
+                break
+            del self._sessions[key]
+            self.expired += 1
+
+    def get(self, user_id, create=False):
+        now = time.monotonic()
+        self._purge(now)
+        session = self._sessions.get(user_id)
+        if session is None:
+            stored = self.backend.load(user_id)
+            if stored is None and not create:
+                return None
+            session = self._install(user_id, stored)
+        else:
+            self._sessions.move_to_end(user_id)
+        session.last_seen = now
+        return session
+
+    def _install(self, user_id, stored=None):
+        session = self._sessions[user_id] = Session()
+        if stored is not None:
+            session.mode, session.cart = stored[0], Cart(stored[1])
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        return session
+
+    async def prefetch(self, user_id):
+        """Load a session from a disk-backed backend on the storage executor."""
+        if not self.backend.blocking or user_id in self._sessions:
+            return
+        stored = await run_storage(self.backend.load, user_id)
+        # Install an empty session for new users too, so get() finds it in
+        # memory instead of asking the backend again on the event loop.
+        if user_id not in self._sessions:
+            self._install(user_id, stored)
+
+    def peek(self, user_id):
+        """The in-memory session if there is one; never loads or reorders."""
+        return self._sessions.get(user_id)
+
+    def cart(self, user_id):
+        session = self.get(user_id)
+        return session.cart if session else EMPTY_CART
+
+    def mode(self, user_id):
+        session = self.get(user_id)
+        return session.mode if session else None
+
+    def set_mode(self, user_id, mode):
+        session = self.get(user_id, create=True)
+        session.mode = mode
+        self.backend.save(user_id, session)
+
+    def set_quantity(self, user_id, item_name, qty, items=None):
+        return self.set_quantities(user_id, {item_name: qty}, items)
+
+    def set_quantities(self, user_id, quantities, items=None):
+        session = self.get(user_id, create=True)
+        session.cart.set_many(quantities, items)
+        self.backend.save(user_id, session)
+        return session.cart
+
+    def clear_cart(self, user_id):
+        session = self.get(user_id)
+        if session is not None:
+            session.cart = Cart()
+            self.backend.save(user_id, session)
+
+    def approx_bytes(self):
+        """Read-only, so metrics can call it from another thread (Flask serves /metrics off the loop)."""
+        # list() copies the values in one step; iterating the live dict could
+        # see it change size mid-way.
+        held = list(self._sessions.values())
+        return sys.getsizeof(self._sessions) + sum(
+            sys.getsizeof(session) + sys.getsizeof(session.cart.lines) for session in held
+        )
+
+    def stats(self):
+        self._purge(time.monotonic())
+        carts = [session.cart for session in self._sessions.values() if session.cart]
+        approx_bytes = self.approx_bytes()
+        return {
+            "sessions": len(self._sessions),
+            "carts": len(carts),
+            "cart_lines": sum(len(cart) for cart in carts),
+            "approx_bytes": approx_bytes,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+
+sessions = SessionStore(make_session_backend())
+atexit.register(sessions.backend.close)
+
+
+def session_key(user_id, guild_id=None):
+    # With per-guild shops a cart only makes sense in the guild it was built in.
+    # Sharded, a guild is always served by the same process, so per-guild keys
+    # also keep each session owned by exactly one process.
+    if (GUILD_CATALOGS or SHARDED) and guild_id is not None:
+        return f"{guild_id}:{user_id}"
+    return user_id
+
+
+async def prefetch_state(key, guild_id=None):
+    """Load an interaction's session and catalog on the storage executor before view code reads them."""
+    await sessions.prefetch(key)
+    await load_items_async(guild_id)
+
 
 MODE_INFO = {
     "buy": ("💰", "Buying", "Buy"),
@@ -182,36 +1503,75 @@ VEHICLE_POWER = {
 }
 
 
+# Seed table for items that have no "category" field yet. Once an item has been
+# saved, its category lives in the catalog and can be changed from /additem.
+DEFAULT_CATEGORIES = {
+    name: category
+    for category, names in (
+        ("Weapons", WEAPONS),
+        ("Ammo & Magazines", AMMO_MAGS),
+        ("Attachments", ATTACHMENTS),
+        ("Armor & Clothing", ARMOR_CLOTHING),
+        ("Medical", MEDICAL),
+        ("Tools & Repair", TOOLS_REPAIR),
+        ("Base & Storage", BASE_STORAGE),
+        ("Explosives", EXPLOSIVES),
+        ("Hunting & Pelts", HUNTING_PELTS),
+        ("Vehicle & Power", VEHICLE_POWER),
+    )
+    for name in names
+}
+CATEGORY_LOOKUP = {category.lower(): category for category in CATEGORY_ORDER}
+
+# Seed shorthands for items that have no "aliases" field yet; after that they
+# live in the catalog and are edited with /additem and /updateitem.
+DEFAULT_ALIASES = {
+    "ka74": ("ak",),
+    "m4a1": ("m4",),
+    "othermag": ("mags",),
+}
+
+
 def get_item_category(item_name: str) -> str:
-    name = item_name.lower()
-    if name in WEAPONS:
-        return "Weapons"
-    if name in AMMO_MAGS:
-        return "Ammo & Magazines"
-    if name in ATTACHMENTS:
-        return "Attachments"
-    if name in ARMOR_CLOTHING:
-        return "Armor & Clothing"
-    if name in MEDICAL:
-        return "Medical"
-    if name in TOOLS_REPAIR:
-        return "Tools & Repair"
-    if name in BASE_STORAGE:
-        return "Base & Storage"
-    if name in EXPLOSIVES:
-        return "Explosives"
-    if name in HUNTING_PELTS:
-        return "Hunting & Pelts"
-    if name in VEHICLE_POWER:
-        return "Vehicle & Power"
-    return "Misc"
+    return DEFAULT_CATEGORIES.get(item_name.lower(), "Misc")
+
+
+def normalize_category(category, item_name: str) -> str:
+    if isinstance(category, str) and category.strip().lower() in CATEGORY_LOOKUP:
+        return CATEGORY_LOOKUP[category.strip().lower()]
+    return get_item_category(item_name)
+
+
+def normalize_aliases(aliases, item_name: str) -> list:
+    if aliases is None or not isinstance(aliases, (str, list, tuple)):
+        aliases = DEFAULT_ALIASES.get(item_name.lower(), ())
+    elif isinstance(aliases, str):
+        aliases = aliases.replace(";", ",").split(",")
+    cleaned = []
+    for alias in aliases:
+        alias = str(alias).strip().lower()
+        if alias and alias != item_name.lower() and alias not in cleaned:
+            cleaned.append(alias)
+    return cleaned
 
 
 def build_categories(items):
     categories = {category: [] for category in CATEGORY_ORDER}
     for name in sorted(items):
-        categories[get_item_category(name)].append(name)
-    return {name: values for name, values in categories.items() if values}
+        categories[items[name].get("category") or get_item_category(name)].append(name)
+    return {name: tuple(values) for name, values in categories.items() if values}
+
+
+def sorted_item_names(items):
+    if isinstance(items, CatalogSnapshot):
+        return items.derived("sorted", lambda snapshot: tuple(sorted(snapshot)))
+    return tuple(sorted(items))
+
+
+def category_buckets(items):
+    if isinstance(items, CatalogSnapshot):
+        return items.derived("categories", build_categories)
+    return build_categories(items)
 
 
 def price_for_mode(item_data, mode: str) -> float:
@@ -226,49 +1586,202 @@ def mode_text(mode):
 
 
 def cart_stats(user_id: int, items, mode=None):
-    cart = user_selected_items.get(user_id, {})
-    line_items = len(cart)
-    units = sum(cart.values())
-    total = 0.0
-    if mode in MODE_INFO:
-        for name, qty in cart.items():
-            data = items.get(name)
-            if data:
-                total += price_for_mode(data, mode) * qty
-    return line_items, units, total
+    return sessions.cart(user_id).stats(items, mode)
 
 
 def normalized_text(value: str) -> str:
     return "".join(ch for ch in value.lower() if ch.isalnum())
 
 
-def find_item_matches(items, query: str, limit=25):
-    query = query.strip().lower()
-    if not query:
-        return []
-
-    query_norm = normalized_text(query)
-    ranked = []
-    for name in items:
-        name_lower = name.lower()
-        name_norm = normalized_text(name_lower)
-        ratio = difflib.SequenceMatcher(None, query_norm, name_norm).ratio()
-
-        if query in name_lower or query_norm in name_norm:
-            score = 3.0 + ratio
-        else:
-            query_parts = [p for p in query.replace("/", " ").split() if p]
-            if query_parts and all(part in name_lower for part in query_parts):
-                score = 2.0 + ratio
-            elif ratio >= 0.42:
-                score = ratio
-            else:
+FUZZY_CUTOFF = 0.42
+# Autocomplete runs on every keystroke: examine at most this many names for
+# fuzzy-only matches.
+AUTOCOMPLETE_FUZZY_BUDGET = 2000
+
+
+class SearchIndex:
+    """Pre-normalised catalog names for find_item_matches().
+
+    Every 1-3 character n-gram of each normalised name is indexed, so substring
+    hits come from a posting-list intersection instead of a scan. Fuzzy-only
+    candidates are narrowed by difflib's own upper bounds (length, then shared
+    characters) before a SequenceMatcher is built, which keeps the ranking
+    identical to scoring every name.
+
+    Exact names and item aliases are also kept in one hash map, so a query
+    that is already a name or a known shorthand resolves without any scoring.
+    """
+
+    def __init__(self, items):
+        self.names = list(items)
+        self.lowered = [name.lower() for name in self.names]
+        self.normalized = [normalized_text(name) for name in self.lowered]
+        self.exact = {}
+        for name in sorted(self.names):
+            for alias in items[name].get("aliases") or ():
+                self.exact.setdefault(normalized_text(alias), name)
+        # A real item name always wins over another item's alias.
+        self.exact.update(zip(self.normalized, self.names))
+        self.exact.pop("", None)
+        self.char_counts = [Counter(norm) for norm in self.normalized]
+        self.grams = defaultdict(set)
+        for index, norm in enumerate(self.normalized):
+            for size in (1, 2, 3):
+                for start in range(len(norm) - size + 1):
+                    self.grams[norm[start:start + size]].add(index)
+        self.by_length = sorted(range(len(self.names)), key=lambda index: len(self.normalized[index]))
+        self.lengths = [len(self.normalized[index]) for index in self.by_length]
+        self.by_prefix = sorted(range(len(self.names)), key=lambda index: (self.normalized[index], self.names[index]))
+        self.prefixes = [self.normalized[index] for index in self.by_prefix]
+
+    def lookup(self, query: str):
+        """The item whose name or alias is exactly `query`, or None."""
+        return self.exact.get(normalized_text(query))
+
+    def containing(self, text):
+        """Indexes whose normalised name contains normalised `text`."""
+        if not text:
+            return set(range(len(self.names)))
+        if len(text) <= 3:
+            return set(self.grams.get(text, ()))
+        postings = sorted((self.grams.get(text[i:i + 3], set()) for i in range(len(text) - 2)), key=len)
+        shortlist = postings[0].intersection(*postings[1:])
+        return {index for index in shortlist if text in self.normalized[index]}
+
+    def exact_first(self, name, query: str, limit=25):
+        """`name` followed by the other names containing `query`, shortest first, without fuzzy scoring."""
+        hits = sorted(self.containing(normalized_text(query)), key=lambda index: (len(self.normalized[index]), self.names[index]))
+        return [name] + [self.names[index] for index in hits if self.names[index] != name][:limit - 1]
+
+    def ratio(self, query_norm, index):
+        return difflib.SequenceMatcher(None, query_norm, self.normalized[index]).ratio()
+
+    def fuzzy_candidates(self, query_norm, exclude, examine=None):
+        query_len = len(query_norm)
+        query_counts = Counter(query_norm)
+        lo = bisect.bisect_left(self.lengths, int(query_len * FUZZY_CUTOFF / (2 - FUZZY_CUTOFF)) - 1)
+        hi = bisect.bisect_right(self.lengths, int(query_len * (2 - FUZZY_CUTOFF) / FUZZY_CUTOFF) + 1)
+        if examine is not None and hi - lo > examine:
+            # Names closest in length to the query can score highest; keep those.
+            middle = bisect.bisect_left(self.lengths, query_len, lo, hi)
+            lo = max(lo, min(middle - examine // 2, hi - examine))
+            hi = lo + examine
+        for index in self.by_length[lo:hi]:
+            if index in exclude:
+                continue
+            total_len = query_len + len(self.normalized[index])
+            if 2.0 * min(query_len, len(self.normalized[index])) / total_len < FUZZY_CUTOFF:
+                continue
+            counts = self.char_counts[index]
+            shared = sum(min(count, counts[ch]) for ch, count in query_counts.items())
+            if 2.0 * shared / total_len < FUZZY_CUTOFF:
                 continue
+            yield index
+
+    def search(self, query: str, limit=25, fuzzy_budget=None):
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        query_norm = normalized_text(query)
+        exact = self.exact.get(query_norm)
+        substring_hits = self.containing(query_norm)
+
+        part_hits = set()
+        query_parts = [p for p in query.replace("/", " ").split() if p]
+        if query_parts:
+            shortlist = None
+            for part in query_parts:
+                found = self.containing(normalized_text(part))
+                shortlist = found if shortlist is None else shortlist & found
+            part_hits = {
+                index for index in shortlist - substring_hits
+                if all(part in self.lowered[index] for part in query_parts)
+            }
+
+        ranked = []
+        for index in substring_hits:
+            ranked.append((3.0 + self.ratio(query_norm, index), self.names[index]))
+        for index in part_hits:
+            ranked.append((2.0 + self.ratio(query_norm, index), self.names[index]))
+        # Fuzzy scores stay below 1, so they only matter while there is room
+        # left under `limit`. `fuzzy_budget` caps how many names are examined.
+        if len(ranked) < limit:
+            for index in self.fuzzy_candidates(query_norm, substring_hits | part_hits, fuzzy_budget):
+                ratio = self.ratio(query_norm, index)
+                if ratio >= FUZZY_CUTOFF:
+                    ranked.append((ratio, self.names[index]))
+
+        ranked.sort(key=lambda pair: (-pair[0], pair[1]))
+        if exact is not None:
+            ranked = [(None, exact)] + [pair for pair in ranked if pair[1] != exact]
+        return [name for _, name in ranked[:limit]]
+
+    def starting_with(self, prefix, limit=25):
+        start = bisect.bisect_left(self.prefixes, prefix)
+        found = []
+        for position in range(start, len(self.prefixes)):
+            if len(found) >= limit or not self.prefixes[position].startswith(prefix):
+                break
+            found.append(self.names[self.by_prefix[position]])
+        return found
+
+    def complete(self, current: str, limit=25):
+        """Autocomplete suggestions: prefix hits first, then fuzzy matches."""
+        prefix = normalized_text(current)
+        if not prefix:
+            return [self.names[index] for index in self.by_prefix[:limit]]
+        suggestions = self.starting_with(prefix, limit)
+        exact = self.exact.get(prefix)
+        if exact is not None:
+            suggestions = [exact] + [name for name in suggestions if name != exact][:limit - 1]
+        if len(suggestions) < limit:
+            seen = set(suggestions)
+            for name in self.search(current, limit, fuzzy_budget=AUTOCOMPLETE_FUZZY_BUDGET):
+                if name not in seen:
+                    suggestions.append(name)
+                    if len(suggestions) >= limit:
+                        break
+        return suggestions
+
+
+def search_index(items):
+    if isinstance(items, CatalogSnapshot):
+        return items.derived("search", SearchIndex)
+    return SearchIndex(items)
+
+
+def warm_indexes(items):
+    """Build a snapshot's derived indexes up front; meant for the storage executor."""
+    search_index(items)
+    sorted_item_names(items)
+    category_buckets(items)
+
+
+def find_item_matches(items, query: str, limit=25):
+    metrics.inc("trader_search_queries_total")
+    return search_index(items).search(query, limit)
+
+
+def resolve_item(items, query: str):
+    """Exact item name or alias lookup, checked before any fuzzy search."""
+    # A raw name wins over normalised matches ("a b" and "ab" normalise alike).
+    name = query.strip().lower()
+    if name not in items:
+        name = search_index(items).lookup(query)
+    if name is not None:
+        metrics.inc("trader_exact_lookups_total")
+    return name
+
+
+def alias_conflicts(items, name, aliases):
+    """(alias, other item) pairs for aliases of `name` that already resolve to another item."""
+    index = search_index(items)
+    return [(alias, other) for alias in aliases if (other := index.lookup(alias)) not in (None, name)]
 
-        ranked.append((score, name))
 
-    ranked.sort(key=lambda pair: (-pair[0], pair[1]))
-    return [name for _, name in ranked[:limit]]
+def conflict_text(conflicts):
+    return "⚠️ " + ", ".join(f"`{alias}` already means {other.title()}" for alias, other in conflicts) + "."
 
 
 def chunk_lines(lines, max_chars=950, max_chunks=5):
@@ -292,6 +1805,143 @@ def chunk_lines(lines, max_chars=950, max_chunks=5):
     return chunks
 
 
+# -------------------------------
+# ✏️ MESSAGE EDIT SCHEDULER
+# -------------------------------
+class MessageEditScheduler:
+    """Coalesces follow-up edits of bot messages.
+
+    Edits to the same message inside EDIT_COALESCE_WINDOW seconds collapse into
+    one, rendered from the latest state at send time. Each channel gets at most
+    EDIT_RATE edits per EDIT_RATE_PER seconds, and a 429 pauses that channel for
+    the retry_after Discord asked for before the edit is tried again.
+    """
+
+    def __init__(self, window=EDIT_COALESCE_WINDOW, rate=EDIT_RATE, per=EDIT_RATE_PER):
+        self.window = window
+        self.rate = rate
+        self.per = per
+        self.scheduled = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        # message id: (message, render)
+        self._pending = {}
+        self._tasks = {}
+        # channel id: recent edit times / paused-until time / running edit tasks
+        self._recent = defaultdict(deque)
+        self._paused_until = {}
+        self._active = defaultdict(int)
+
+    def schedule(self, message, render):
+        """Queue `message.edit(**render())`; only the newest render per message is sent."""
+        self.scheduled += 1
+        if message.id in self._pending:
+            self.coalesced += 1
+        self._pending[message.id] = (message, render)
+        if message.id not in self._tasks:
+            channel_id = getattr(message.channel, "id", 0)
+            self._active[channel_id] += 1
+            self._tasks[message.id] = asyncio.get_running_loop().create_task(self._run(message.id, channel_id))
+
+    async def _wait_for_slot(self, channel_id):
+        recent = self._recent[channel_id]
+        while True:
+            now = time.monotonic()
+            while recent and now - recent[0] >= self.per:
+                recent.popleft()
+            delay = self._paused_until.get(channel_id, 0) - now
+            if len(recent) >= self.rate:
+                delay = max(delay, self.per - (now - recent[0]))
+            if delay <= 0:
+                recent.append(now)
+                return
+            await asyncio.sleep(delay)
+
+    async def _run(self, message_id, channel_id):
+        try:
+            while message_id in self._pending:
+                await asyncio.sleep(self.window)
+                await self._wait_for_slot(channel_id)
+                message, render = self._pending.pop(message_id)
+                try:
+                    await message.edit(**render())
+                except discord.RateLimited as exc:
+                    self._rate_limited(message, render, exc.retry_after)
+                except discord.HTTPException as exc:
+                    if exc.status == 429:
+                        self._rate_limited(message, render, getattr(exc, "retry_after", self.per))
+                    else:
+                        self.dropped += 1
+                except Exception:
+                    logging.exception("Scheduled edit of message %s failed", message_id)
+                    self.dropped += 1
+                else:
+                    self.sent += 1
+        finally:
+            self._tasks.pop(message_id, None)
+            self._active[channel_id] -= 1
+            if not self._active[channel_id]:
+                del self._active[channel_id]
+            self._prune()
+
+    def _prune(self):
+        """Forget channels with no edit in flight once their rate window and pause have passed."""
+        now = time.monotonic()
+        for channel_id in list(self._recent.keys() | self._paused_until.keys()):
+            if channel_id in self._active:
+                continue
+            recent = self._recent.get(channel_id)
+            if recent and now - recent[-1] < self.per:
+                continue
+            if self._paused_until.get(channel_id, 0) > now:
+                continue
+            self._recent.pop(channel_id, None)
+            self._paused_until.pop(channel_id, None)
+
+    def _rate_limited(self, message, render, retry_after):
+        self.rate_limited += 1
+        channel_id = getattr(message.channel, "id", 0)
+        self._paused_until[channel_id] = time.monotonic() + retry_after
+        # Retry after the pause, unless a newer render was queued meanwhile.
+        self._pending.setdefault(message.id, (message, render))
+
+    def stats(self):
+        return {
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "pending": len(self._pending),
+        }
+
+
+edit_scheduler = MessageEditScheduler()
+
+metrics.gauge("trader_event_loop_lag_seconds", "Most recent event-loop lag.", lambda: loop_monitor.last_lag)
+metrics.gauge("trader_event_loop_max_lag_seconds", "Worst event-loop lag since start.", lambda: loop_monitor.max_lag)
+metrics.gauge("trader_event_loop_stalls", "Stalls the loop watchdog has reported.", lambda: loop_monitor.stalls)
+metrics.gauge("trader_active_sessions", "Calculator sessions held in memory.", lambda: len(sessions))
+metrics.gauge("trader_session_memory_bytes", "Approximate memory held by sessions.", sessions.approx_bytes)
+metrics.gauge("trader_sessions_evicted", "Sessions evicted to stay under SESSION_MAX.", lambda: sessions.evicted)
+metrics.gauge("trader_sessions_expired", "Sessions dropped after SESSION_TTL idle.", lambda: sessions.expired)
+metrics.gauge("trader_catalog_items", "Items in the current catalog snapshot.", lambda: len(catalog.items))
+metrics.gauge("trader_catalog_version", "Current catalog snapshot version.", lambda: catalog.version)
+metrics.gauge("trader_guild_catalogs_loaded", "Per-guild catalogs held in memory.", lambda: len(guild_catalogs))
+metrics.gauge(
+    "trader_guild_catalogs_evicted",
+    "Per-guild catalogs dropped to stay under CATALOG_CACHE_SIZE.",
+    lambda: guild_catalogs.evicted,
+)
+metrics.gauge("trader_render_cache_hits", "Browser page renders served from cache.", lambda: render_cache.hits)
+metrics.gauge("trader_render_cache_misses", "Browser page renders built from scratch.", lambda: render_cache.misses)
+metrics.gauge("trader_message_edits_sent", "Scheduled message edits sent.", lambda: edit_scheduler.sent)
+metrics.gauge("trader_message_edits_coalesced", "Message edits merged into a newer one.", lambda: edit_scheduler.coalesced)
+metrics.gauge("trader_message_edits_dropped", "Message edits that failed for reasons other than a 429.", lambda: edit_scheduler.dropped)
+
+
 # -------------------------------
 # 🧮 QUANTITY MODAL
 # -------------------------------
@@ -303,7 +1953,7 @@ class QuantityModal(discord.ui.Modal):
         self.source_view = source_view
         self.source_message = source_message
 
-        current_qty = user_selected_items.get(main_view.owner_id, {}).get(self.item_name)
+        current_qty = sessions.cart(main_view.session_key).get(self.item_name)
         self.quantity = discord.ui.TextInput(
             label=f"{self.item_name.title()} Quantity"[:45],
             placeholder="Whole number (example: 3)",
@@ -313,10 +1963,12 @@ class QuantityModal(discord.ui.Modal):
         )
         self.add_item(self.quantity)
 
+    @timed("trader_view_callback_seconds", callback="QuantityModal.on_submit")
     async def on_submit(self, interaction: discord.Interaction):
         if interaction.user.id != self.main_view.owner_id:
             await interaction.response.send_message("❌ This calculator belongs to someone else.", ephemeral=True)
             return
+        await sessions.prefetch(self.main_view.session_key)
 
         raw = self.quantity.value.strip().replace(",", "")
         try:
@@ -329,18 +1981,16 @@ class QuantityModal(discord.ui.Modal):
             await interaction.response.send_message("⚠️ Quantity cannot be negative.", ephemeral=True)
             return
 
-        items = load_items()
+        items = await load_items_async(self.main_view.guild_id)
         item_data = items.get(self.item_name)
         if not item_data:
             await interaction.response.send_message("❌ That item no longer exists in the shop.", ephemeral=True)
             return
 
-        cart = user_selected_items.setdefault(self.main_view.owner_id, {})
+        sessions.set_quantity(self.main_view.session_key, self.item_name, qty, items)
         if qty == 0:
-            cart.pop(self.item_name, None)
             action = f"🗑️ Removed **{self.item_name.title()}** from your cart."
         else:
-            cart[self.item_name] = qty
             mode = self.main_view.mode
             if mode in MODE_INFO:
                 subtotal = price_for_mode(item_data, mode) * qty
@@ -348,10 +1998,7 @@ class QuantityModal(discord.ui.Modal):
             else:
                 action = f"✅ **{self.item_name.title()} × {qty}** saved."
 
-        if not cart:
-            user_selected_items.pop(self.main_view.owner_id, None)
-
-        line_items, units, total = cart_stats(self.main_view.owner_id, items, self.main_view.mode)
+        line_items, units, total = cart_stats(self.main_view.session_key, items, self.main_view.mode)
         if self.main_view.mode in MODE_INFO:
             status = f"🛒 Cart: **{line_items} items / {units} units** • Running total: **${total:,.2f}**"
         else:
@@ -361,27 +2008,190 @@ class QuantityModal(discord.ui.Modal):
         await self.main_view.refresh_main_message()
 
         if self.source_view is not None and self.source_message is not None:
-            try:
-                if hasattr(self.source_view, "reload_from_cart"):
-                    self.source_view.reload_from_cart()
-                self.source_view.update_view()
-                await self.source_message.edit(embed=self.source_view.current_embed, view=self.source_view)
-            except (discord.HTTPException, AttributeError):
-                pass
+            edit_scheduler.schedule(self.source_message, self.render_source)
+
+    def render_source(self):
+        if hasattr(self.source_view, "reload_from_cart"):
+            self.source_view.reload_from_cart()
+        self.source_view.update_view()
+        return {"content": None, "embed": self.source_view.current_embed, "view": self.source_view}
+
+
+# -------------------------------
+# 📋 BULK QUANTITY MODAL
+# -------------------------------
+BULK_MAX_LINES = 25
+
+
+def parse_quantity_lines(text, items, max_errors=5):
+    """Read "name = qty" lines into ({item: qty}, [errors]). Names may be aliases."""
+    quantities, errors = {}, []
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) > BULK_MAX_LINES:
+        return {}, [f"Please enter at most {BULK_MAX_LINES} lines at a time."]
+    for line in lines:
+        name, sep, raw = line.rpartition("=")
+        if not sep:
+            name, _, raw = line.rpartition(" ")
+        name = name.strip().lower()
+        item = resolve_item(items, name)
+        try:
+            qty = int(raw.strip().replace(",", ""))
+        except ValueError:
+            qty = None
+        if item is None:
+            errors.append(f"`{line[:60]}` — no item called **{name[:40] or '?'}**")
+        elif qty is None or qty < 0:
+            errors.append(f"`{line[:60]}` — the quantity must be a whole number, `0` or more")
+        else:
+            quantities[item] = qty
+        if len(errors) >= max_errors:
+            break
+    return quantities, errors
+
+
+class BulkQuantityModal(discord.ui.Modal):
+    """Quantities for every item picked in a bulk select, saved as one cart update."""
+
+    def __init__(self, main_view, item_names, source_view):
+        super().__init__(title="Enter Quantities")
+        self.main_view = main_view
+        self.source_view = source_view
+
+        cart = sessions.cart(main_view.session_key)
+        self.quantities = discord.ui.TextInput(
+            label="One item per line: name = quantity",
+            style=discord.TextStyle.paragraph,
+            placeholder="ka74 = 2\nothermag = 6\n(0 removes an item)",
+            default="\n".join(f"{name} = {cart.get(name, 1)}" for name in item_names),
+            required=True,
+            max_length=4000,
+        )
+        self.add_item(self.quantities)
+
+    @timed("trader_view_callback_seconds", callback="BulkQuantityModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        if interaction.user.id != self.main_view.owner_id:
+            await interaction.response.send_message("❌ This calculator belongs to someone else.", ephemeral=True)
+            return
+        await sessions.prefetch(self.main_view.session_key)
+
+        items = await load_items_async(self.main_view.guild_id)
+        quantities, errors = parse_quantity_lines(self.quantities.value, items)
+        if errors:
+            await interaction.response.send_message(
+                "⚠️ Nothing was saved. Please fix these lines:\n" + "\n".join(f"• {error}" for error in errors),
+                ephemeral=True,
+            )
+            return
+
+        sessions.set_quantities(self.main_view.session_key, quantities, items)
+        saved = sum(1 for qty in quantities.values() if qty)
+        removed = len(quantities) - saved
+        parts = []
+        if saved:
+            parts.append(f"✅ Saved **{saved}** item(s)")
+        if removed:
+            parts.append(f"🗑️ Removed **{removed}** item(s)")
+        action = " • ".join(parts) or "✅ Nothing to change."
+
+        line_items, units, total = cart_stats(self.main_view.session_key, items, self.main_view.mode)
+        if self.main_view.mode in MODE_INFO:
+            status = f"🛒 Cart: **{line_items} items / {units} units** • Running total: **${total:,.2f}**"
+        else:
+            status = f"🛒 Cart: **{line_items} items / {units} units**"
+
+        # The browser is redrawn as the reply itself; the dashboard gets one
+        # scheduled edit, whatever the number of lines.
+        self.source_view.update_view()
+        await interaction.response.edit_message(
+            content=f"{action}\n{status}", embed=self.source_view.current_embed, view=self.source_view
+        )
+        await self.main_view.refresh_main_message()
 
 
 # -------------------------------
 # 📖 BROWSE / SEARCH RESULTS VIEW
 # -------------------------------
+class RenderCache:
+    """LRU of rendered browser pages: (select options, embed) per page state."""
+
+    def __init__(self, max_entries=RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        rendered = self._entries.get(key)
+        if rendered is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return rendered
+
+    def put(self, key, rendered):
+        self._entries[key] = rendered
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return rendered
+
+    def rekey(self, items):
+        """Carry pages over to an edited catalog snapshot unless a changed item shows on them.
+
+        Only price edits of existing items qualify: added or removed names,
+        new categories and new aliases change which items a list holds. A page
+        is affected when it lists a changed item or its cart footer prices one;
+        everything else renders the same.
+        """
+        changed = set(items.previous)
+        if items.base_version is None or not all(
+            old is not None and name in items
+            and old["category"] == items[name]["category"] and old["aliases"] == items[name]["aliases"]
+            for name, old in items.previous.items()
+        ):
+            return 0
+        carried = 0
+        for key, rendered in list(self._entries.items()):
+            title, list_key, page, mode, version, owner, cart_version = key
+            if version != items.base_version:
+                continue
+            options, _ = rendered
+            if any(option.value in changed for option in options):
+                continue
+            session = sessions.peek(owner)
+            if session is None or session.cart.version != cart_version or not changed.isdisjoint(session.cart.lines):
+                continue
+            self._entries[(title, list_key, page, mode, items.version, owner, cart_version)] = rendered
+            carried += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return carried
+
+
+render_cache = RenderCache()
+
+
 class ItemBrowserView(discord.ui.View):
-    def __init__(self, main_view, item_names, title, page=0, timeout=180):
+    def __init__(self, main_view, item_names, title, page=0, timeout=180, list_key=None):
         super().__init__(timeout=timeout)
         self.main_view = main_view
         self.owner_id = main_view.owner_id
+        self.session_key = main_view.session_key
         self.item_names = list(item_names)
         self.title = title
+        # Identifies where item_names came from (given the catalog version) so
+        # renders can be shared between views; unnamed lists stay per-view.
+        self.list_key = list_key if list_key is not None else ("view", id(self))
         self.page = page
         self.page_size = 25
+        # Bulk mode: the select takes the whole page and one modal sets every quantity.
+        self.bulk = False
         self.current_embed = None
         self.select_menu = None
         self.update_view()
@@ -390,6 +2200,7 @@ class ItemBrowserView(discord.ui.View):
         if interaction.user.id != self.owner_id:
             await interaction.response.send_message("❌ This calculator belongs to someone else.", ephemeral=True)
             return False
+        await prefetch_state(self.session_key, self.main_view.guild_id)
         return True
 
     @property
@@ -401,7 +2212,7 @@ class ItemBrowserView(discord.ui.View):
         return self.item_names[start:start + self.page_size]
 
     def create_embed(self):
-        items = load_items()
+        items = current_items(self.main_view.guild_id)
         mode = self.main_view.mode
         if mode not in MODE_INFO:
             return discord.Embed(
@@ -412,7 +2223,7 @@ class ItemBrowserView(discord.ui.View):
 
         emoji, long_name, short_name = MODE_INFO[mode]
         lines = []
-        cart = user_selected_items.get(self.owner_id, {})
+        cart = sessions.cart(self.session_key)
         for name in self.page_items():
             data = items.get(name)
             if not data:
@@ -433,24 +2244,17 @@ class ItemBrowserView(discord.ui.View):
             ),
             color=discord.Color.gold(),
         )
-        line_items, units, total = cart_stats(self.owner_id, items, mode)
+        line_items, units, total = cart_stats(self.session_key, items, mode)
         embed.set_footer(text=f"Cart: {line_items} items / {units} units • {short_name} total: ${total:,.2f}")
         return embed
 
-    def update_view(self):
-        items = load_items()
-        mode = self.main_view.mode
-
-        for child in list(self.children):
-            if isinstance(child, discord.ui.Select):
-                self.remove_item(child)
-
+    def build_options(self, items, mode, cart):
         options = []
         for name in self.page_items():
             data = items.get(name)
             if not data:
                 continue
-            cart_qty = user_selected_items.get(self.owner_id, {}).get(name)
+            cart_qty = cart.get(name)
             if mode in MODE_INFO:
                 price = price_for_mode(data, mode)
                 desc = f"${price:,.2f}"
@@ -459,13 +2263,30 @@ class ItemBrowserView(discord.ui.View):
             if cart_qty:
                 desc += f" • Cart x{cart_qty}"
             options.append(discord.SelectOption(label=name.title()[:100], value=name, description=desc[:100]))
+        return options
+
+    def update_view(self):
+        items = current_items(self.main_view.guild_id)
+        mode = self.main_view.mode
+        cart = sessions.cart(self.session_key)
+
+        for child in list(self.children):
+            if isinstance(child, discord.ui.Select):
+                self.remove_item(child)
+
+        key = (self.title, self.list_key, self.page, mode, items.version, self.session_key, cart.version)
+        rendered = render_cache.get(key)
+        if rendered is None:
+            rendered = render_cache.put(key, (self.build_options(items, mode, cart), self.create_embed()))
+        options, self.current_embed = rendered
 
         if options:
             self.select_menu = discord.ui.Select(
-                placeholder="Select an item to enter quantity...",
+                placeholder="Select items, then enter all quantities at once..." if self.bulk
+                else "Select an item to enter quantity...",
                 min_values=1,
-                max_values=1,
-                options=options,
+                max_values=len(options) if self.bulk else 1,
+                options=list(options),
                 row=0,
             )
             self.select_menu.callback = self.handle_select
@@ -473,27 +2294,40 @@ class ItemBrowserView(discord.ui.View):
 
         self.prev_button.disabled = self.page <= 0
         self.next_button.disabled = self.page >= self.page_count - 1
-        self.current_embed = self.create_embed()
+        self.bulk_button.label = "☝️ One at a Time" if self.bulk else "📋 Bulk Add"
 
+    @timed("trader_view_callback_seconds", callback="ItemBrowserView.handle_select")
     async def handle_select(self, interaction: discord.Interaction):
+        if self.bulk:
+            await interaction.response.send_modal(BulkQuantityModal(self.main_view, self.select_menu.values, self))
+            return
         selected_item = self.select_menu.values[0]
         await interaction.response.send_modal(
             QuantityModal(self.main_view, selected_item, source_view=self, source_message=interaction.message)
         )
 
     @discord.ui.button(label="⬅️ Prev", style=discord.ButtonStyle.secondary, row=1)
+    @timed("trader_view_callback_seconds", callback="ItemBrowserView.prev_button")
     async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.page > 0:
             self.page -= 1
         self.update_view()
-        await interaction.response.edit_message(embed=self.current_embed, view=self)
+        await interaction.response.edit_message(content=None, embed=self.current_embed, view=self)
 
     @discord.ui.button(label="➡️ Next", style=discord.ButtonStyle.secondary, row=1)
+    @timed("trader_view_callback_seconds", callback="ItemBrowserView.next_button")
     async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.page < self.page_count - 1:
             self.page += 1
         self.update_view()
-        await interaction.response.edit_message(embed=self.current_embed, view=self)
+        await interaction.response.edit_message(content=None, embed=self.current_embed, view=self)
+
+    @discord.ui.button(label="📋 Bulk Add", style=discord.ButtonStyle.primary, row=1)
+    @timed("trader_view_callback_seconds", callback="ItemBrowserView.bulk_button")
+    async def bulk_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.bulk = not self.bulk
+        self.update_view()
+        await interaction.response.edit_message(content=None, embed=self.current_embed, view=self)
 
 
 # -------------------------------
@@ -504,8 +2338,8 @@ class CategoryView(discord.ui.View):
         super().__init__(timeout=180)
         self.main_view = main_view
         self.owner_id = main_view.owner_id
-        items = load_items()
-        self.categories = build_categories(items)
+        self.session_key = main_view.session_key
+        self.categories = category_buckets(current_items(self.main_view.guild_id))
 
         options = [
             discord.SelectOption(label=name, value=name, description=f"{len(names)} item(s)")
@@ -524,12 +2358,14 @@ class CategoryView(discord.ui.View):
         if interaction.user.id != self.owner_id:
             await interaction.response.send_message("❌ This calculator belongs to someone else.", ephemeral=True)
             return False
+        await prefetch_state(self.session_key, self.main_view.guild_id)
         return True
 
+    @timed("trader_view_callback_seconds", callback="CategoryView.select_category")
     async def select_category(self, interaction: discord.Interaction):
         category = interaction.data["values"][0]
         names = self.categories.get(category, [])
-        browser = ItemBrowserView(self.main_view, names, f"📂 {category}")
+        browser = ItemBrowserView(self.main_view, names, f"📂 {category}", list_key=("category", category))
         await interaction.response.edit_message(embed=browser.current_embed, view=browser)
 
 
@@ -548,13 +2384,19 @@ class SearchItemModal(discord.ui.Modal, title="Search Shop Items"):
         super().__init__()
         self.main_view = main_view
 
+    @timed("trader_view_callback_seconds", callback="SearchItemModal.on_submit")
     async def on_submit(self, interaction: discord.Interaction):
         if interaction.user.id != self.main_view.owner_id:
             await interaction.response.send_message("❌ This calculator belongs to someone else.", ephemeral=True)
             return
+        await sessions.prefetch(self.main_view.session_key)
 
-        items = load_items()
-        matches = find_item_matches(items, str(self.query.value), limit=25)
+        items = await load_items_async(self.main_view.guild_id)
+        exact = resolve_item(items, str(self.query.value))
+        if exact is not None:
+            matches = search_index(items).exact_first(exact, str(self.query.value), limit=25)
+        else:
+            matches = find_item_matches(items, str(self.query.value), limit=25)
         if not matches:
             await interaction.response.send_message(
                 f"❌ No items found matching **{self.query.value}**.",
@@ -566,6 +2408,7 @@ class SearchItemModal(discord.ui.Modal, title="Search Shop Items"):
             self.main_view,
             matches,
             f"🔎 Search: {str(self.query.value).strip()}",
+            list_key="search",
         )
         await interaction.response.send_message(embed=browser.current_embed, view=browser, ephemeral=False)
 
@@ -575,18 +2418,18 @@ class SearchItemModal(discord.ui.Modal, title="Search Shop Items"):
 # -------------------------------
 class CartView(ItemBrowserView):
     def __init__(self, main_view):
-        names = list(user_selected_items.get(main_view.owner_id, {}).keys())
-        super().__init__(main_view, names, "🛒 Your Cart", timeout=180)
+        names = list(sessions.cart(main_view.session_key).keys())
+        super().__init__(main_view, names, "🛒 Your Cart", timeout=180, list_key="cart")
 
     def reload_from_cart(self):
-        self.item_names = list(user_selected_items.get(self.owner_id, {}).keys())
+        self.item_names = list(sessions.cart(self.session_key).keys())
         self.item_names.sort()
         self.page = min(self.page, self.page_count - 1)
 
     def create_embed(self):
-        items = load_items()
+        items = current_items(self.main_view.guild_id)
         mode = self.main_view.mode
-        cart = user_selected_items.get(self.owner_id, {})
+        cart = sessions.cart(self.session_key)
 
         if not cart:
             return discord.Embed(
@@ -608,7 +2451,7 @@ class CartView(ItemBrowserView):
             else:
                 lines.append(f"• **{name.title()} × {qty}**")
 
-        line_items, units, total = cart_stats(self.owner_id, items, mode)
+        line_items, units, total = cart_stats(self.session_key, items, mode)
         description = "Select an item below to change its quantity. Enter `0` to remove it.\n\n" + "\n".join(lines)
         embed = discord.Embed(
             title=f"🛒 Your Cart (Page {self.page + 1}/{self.page_count})",
@@ -634,20 +2477,24 @@ class ConfirmClearView(discord.ui.View):
         super().__init__(timeout=60)
         self.main_view = main_view
         self.owner_id = main_view.owner_id
+        self.session_key = main_view.session_key
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.owner_id:
             await interaction.response.send_message("❌ This calculator belongs to someone else.", ephemeral=True)
             return False
+        await prefetch_state(self.session_key, self.main_view.guild_id)
         return True
 
     @discord.ui.button(label="🗑️ Clear Cart", style=discord.ButtonStyle.danger)
+    @timed("trader_view_callback_seconds", callback="ConfirmClearView.confirm")
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_selected_items.pop(self.owner_id, None)
+        sessions.clear_cart(self.session_key)
         await interaction.response.edit_message(content="🧹 Your calculator cart has been cleared.", embed=None, view=None)
         await self.main_view.refresh_main_message()
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    @timed("trader_view_callback_seconds", callback="ConfirmClearView.cancel")
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(content="✅ Clear cancelled.", embed=None, view=None)
 
@@ -655,39 +2502,104 @@ class ConfirmClearView(discord.ui.View):
 # -------------------------------
 # 🧮 MAIN CALCULATOR VIEW
 # -------------------------------
-class TotalView(discord.ui.View):
-    def __init__(self, owner: discord.Member | discord.User):
-        super().__init__(timeout=900)
-        self.owner_id = owner.id
-        self.owner_name = owner.display_name
-        self.mode = user_calc_mode.get(self.owner_id)
-        self.message = None
-        self.sync_controls()
+# action: (label, style, row, TotalView handler)
+CALCULATOR_BUTTONS = {
+    "buy": ("💰 Buying", discord.ButtonStyle.secondary, 0, "buying"),
+    "sell": ("💵 Selling", discord.ButtonStyle.secondary, 0, "selling"),
+    "search": ("🔎 Search Item", discord.ButtonStyle.primary, 1, "search_item"),
+    "categories": ("📂 Categories", discord.ButtonStyle.primary, 1, "categories"),
+    "browse": ("📖 Browse All", discord.ButtonStyle.secondary, 1, "browse_all"),
+    "cart": ("🛒 View / Edit Cart", discord.ButtonStyle.primary, 2, "view_cart"),
+    "calculate": ("✅ Calculate", discord.ButtonStyle.success, 2, "calculate_total"),
+    "clear": ("🗑️ Clear", discord.ButtonStyle.danger, 2, "clear_cart"),
+}
+NEEDS_MODE = {"search", "categories", "browse", "calculate"}
+
+
+class CalculatorButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"calc:(?P<action>[a-z]+):(?P<owner>\d+):(?P<mode>buy|sell|none)",
+):
+    """A dashboard button that carries its own state in the custom_id.
+
+    Registered once with `bot.add_dynamic_items`, so clicks are handled after a
+    restart or any amount of time without keeping a view per message: the click
+    rebuilds a TotalView from the owner and mode in the ID plus the session store.
+    """
+
+    def __init__(self, action, owner_id, mode=None):
+        label, style, row, _ = CALCULATOR_BUTTONS[action]
+        if action == mode:
+            style = discord.ButtonStyle.success
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                row=row,
+                disabled=action in NEEDS_MODE and mode not in MODE_INFO,
+                custom_id=f"calc:{action}:{owner_id}:{mode or 'none'}",
+            ),
+            row=row,
+        )
+        self.action = action
+        self.owner_id = owner_id
+        self.mode = mode
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        action = match["action"]
+        if action not in CALCULATOR_BUTTONS:
+            raise ValueError(f"unknown calculator action {action!r}")
+        mode = match["mode"]
+        return cls(action, int(match["owner"]), None if mode == "none" else mode)
+
+    async def callback(self, interaction: discord.Interaction):
         if interaction.user.id != self.owner_id:
             await interaction.response.send_message(
-                f"❌ This calculator belongs to **{self.owner_name}**. Run `/total` to open your own.",
+                f"❌ This calculator belongs to <@{self.owner_id}>. Run `/total` to open your own.",
                 ephemeral=True,
+                allowed_mentions=discord.AllowedMentions.none(),
             )
-            return False
-        return True
+            return
+        # After a restart, or once the guild's catalog was evicted, nothing is in
+        # memory yet; load it off the event loop before the view reads it.
+        await prefetch_state(session_key(self.owner_id, interaction.guild_id), interaction.guild_id)
+        view = TotalView(interaction.user, interaction.guild_id, mode=self.mode, message=interaction.message)
+        await getattr(view, CALCULATOR_BUTTONS[self.action][3])(interaction)
+
+
+class TotalView(discord.ui.View):
+    """The calculator dashboard. Short-lived: built per render or click, never stored."""
+
+    def __init__(self, owner: discord.Member | discord.User, guild_id=None, mode=None, message=None):
+        super().__init__(timeout=None)
+        self.owner_id = owner.id
+        self.owner_name = owner.display_name
+        self.guild_id = guild_id
+        self.session_key = session_key(owner.id, guild_id)
+        # Mode from the button that was clicked, used if the session is gone.
+        self.fallback_mode = mode
+        self.message = message
+        self.sync_controls()
+
+    @property
+    def mode(self):
+        return sessions.mode(self.session_key) or self.fallback_mode
+
+    @mode.setter
+    def mode(self, mode):
+        self.fallback_mode = mode
+        sessions.set_mode(self.session_key, mode)
 
     def sync_controls(self):
-        mode_selected = self.mode in MODE_INFO
-        for child in self.children:
-            if not isinstance(child, discord.ui.Button):
-                continue
-            if child.custom_id == "calc:buy":
-                child.style = discord.ButtonStyle.success if self.mode == "buy" else discord.ButtonStyle.secondary
-            elif child.custom_id == "calc:sell":
-                child.style = discord.ButtonStyle.success if self.mode == "sell" else discord.ButtonStyle.secondary
-            elif child.custom_id in {"calc:search", "calc:categories", "calc:browse", "calc:calculate"}:
-                child.disabled = not mode_selected
+        self.clear_items()
+        mode = self.mode
+        for action in CALCULATOR_BUTTONS:
+            self.add_item(CalculatorButton(action, self.owner_id, mode))
 
     def create_dashboard_embed(self):
-        items = load_items()
-        line_items, units, total = cart_stats(self.owner_id, items, self.mode)
+        items = current_items(self.guild_id)
+        line_items, units, total = cart_stats(self.session_key, items, self.mode)
 
         if self.mode in MODE_INFO:
             emoji, long_name, short_name = MODE_INFO[self.mode]
@@ -711,7 +2623,7 @@ class TotalView(discord.ui.View):
         embed.add_field(name="Running Total", value=running_total, inline=False)
 
         if line_items:
-            cart = user_selected_items.get(self.owner_id, {})
+            cart = sessions.cart(self.session_key)
             preview = []
             for name, qty in list(cart.items())[:5]:
                 preview.append(f"• {name.title()} × {qty}")
@@ -719,38 +2631,42 @@ class TotalView(discord.ui.View):
                 preview.append(f"• …and {line_items - 5} more")
             embed.add_field(name="Current Cart", value="\n".join(preview), inline=False)
 
-        embed.set_footer(text=f"Only {self.owner_name} can use these controls • Session buttons expire after 15 minutes")
+        if SESSION_BACKEND == "sqlite":
+            kept = "Your cart stays saved between visits"
+        else:
+            # Memory sessions expire after SESSION_TTL idle and don't survive a restart.
+            kept = f"Carts are cleared after {max(1, round(SESSION_TTL / 60))} min idle"
+        embed.set_footer(text=f"Only {self.owner_name} can use these controls • {kept}")
         return embed
 
     async def refresh_main_message(self):
-        self.sync_controls()
         if self.message is not None:
-            try:
-                await self.message.edit(embed=self.create_dashboard_embed(), view=self)
-            except discord.HTTPException:
-                pass
+            edit_scheduler.schedule(self.message, self.render_dashboard)
+
+    def render_dashboard(self):
+        self.sync_controls()
+        return {"embed": self.create_dashboard_embed(), "view": self}
 
     async def set_mode(self, interaction: discord.Interaction, mode: str):
         self.mode = mode
-        user_calc_mode[self.owner_id] = mode
         self.sync_controls()
         await interaction.response.edit_message(embed=self.create_dashboard_embed(), view=self)
 
-    @discord.ui.button(label="💰 Buying", style=discord.ButtonStyle.secondary, row=0, custom_id="calc:buy")
-    async def buying(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @timed("trader_view_callback_seconds", callback="TotalView.buying")
+    async def buying(self, interaction: discord.Interaction):
         await self.set_mode(interaction, "buy")
 
-    @discord.ui.button(label="💵 Selling", style=discord.ButtonStyle.secondary, row=0, custom_id="calc:sell")
-    async def selling(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @timed("trader_view_callback_seconds", callback="TotalView.selling")
+    async def selling(self, interaction: discord.Interaction):
         await self.set_mode(interaction, "sell")
 
-    @discord.ui.button(label="🔎 Search Item", style=discord.ButtonStyle.primary, row=1, custom_id="calc:search")
-    async def search_item(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @timed("trader_view_callback_seconds", callback="TotalView.search_item")
+    async def search_item(self, interaction: discord.Interaction):
         await interaction.response.send_modal(SearchItemModal(self))
 
-    @discord.ui.button(label="📂 Categories", style=discord.ButtonStyle.primary, row=1, custom_id="calc:categories")
-    async def categories(self, interaction: discord.Interaction, button: discord.ui.Button):
-        items = load_items()
+    @timed("trader_view_callback_seconds", callback="TotalView.categories")
+    async def categories(self, interaction: discord.Interaction):
+        items = await load_items_async(self.guild_id)
         if not items:
             await interaction.response.send_message("⚠️ The shop is empty.", ephemeral=True)
             return
@@ -762,18 +2678,18 @@ class TotalView(discord.ui.View):
         )
         await interaction.response.send_message(embed=embed, view=view, ephemeral=False)
 
-    @discord.ui.button(label="📖 Browse All", style=discord.ButtonStyle.secondary, row=1, custom_id="calc:browse")
-    async def browse_all(self, interaction: discord.Interaction, button: discord.ui.Button):
-        items = load_items()
+    @timed("trader_view_callback_seconds", callback="TotalView.browse_all")
+    async def browse_all(self, interaction: discord.Interaction):
+        items = await load_items_async(self.guild_id)
         if not items:
             await interaction.response.send_message("⚠️ The shop is empty.", ephemeral=True)
             return
-        browser = ItemBrowserView(self, sorted(items), "📖 Browse All Items")
+        browser = ItemBrowserView(self, sorted_item_names(items), "📖 Browse All Items", list_key="all")
         await interaction.response.send_message(embed=browser.current_embed, view=browser, ephemeral=False)
 
-    @discord.ui.button(label="🛒 View / Edit Cart", style=discord.ButtonStyle.primary, row=2, custom_id="calc:cart")
-    async def view_cart(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not user_selected_items.get(self.owner_id):
+    @timed("trader_view_callback_seconds", callback="TotalView.view_cart")
+    async def view_cart(self, interaction: discord.Interaction):
+        if not sessions.cart(self.session_key):
             await interaction.response.send_message(
                 "🛒 Your cart is empty. Use **Search**, **Categories**, or **Browse All** to add something.",
                 ephemeral=True,
@@ -782,9 +2698,9 @@ class TotalView(discord.ui.View):
         cart_view = CartView(self)
         await interaction.response.send_message(embed=cart_view.current_embed, view=cart_view, ephemeral=False)
 
-    @discord.ui.button(label="✅ Calculate", style=discord.ButtonStyle.success, row=2, custom_id="calc:calculate")
-    async def calculate_total(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cart = user_selected_items.get(self.owner_id, {})
+    @timed("trader_view_callback_seconds", callback="TotalView.calculate_total")
+    async def calculate_total(self, interaction: discord.Interaction):
+        cart = sessions.cart(self.session_key)
         if not cart:
             await interaction.response.send_message("⚠️ Your cart is empty.", ephemeral=True)
             return
@@ -792,7 +2708,7 @@ class TotalView(discord.ui.View):
             await interaction.response.send_message("⚠️ Choose **Buying** or **Selling** first.", ephemeral=True)
             return
 
-        items = load_items()
+        items = await load_items_async(self.guild_id)
         emoji, long_name, short_name = MODE_INFO[self.mode]
         total = 0.0
         lines = []
@@ -831,12 +2747,12 @@ class TotalView(discord.ui.View):
         summary.set_footer(text="Cart cleared after calculation")
 
         await interaction.response.send_message(embed=summary, ephemeral=False)
-        user_selected_items.pop(self.owner_id, None)
+        sessions.clear_cart(self.session_key)
         await self.refresh_main_message()
 
-    @discord.ui.button(label="🗑️ Clear", style=discord.ButtonStyle.danger, row=2, custom_id="calc:clear")
-    async def clear_cart(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not user_selected_items.get(self.owner_id):
+    @timed("trader_view_callback_seconds", callback="TotalView.clear_cart")
+    async def clear_cart(self, interaction: discord.Interaction):
+        if not sessions.cart(self.session_key):
             await interaction.response.send_message("🛒 Your cart is already empty.", ephemeral=True)
             return
         await interaction.response.send_message(
@@ -845,48 +2761,68 @@ class TotalView(discord.ui.View):
             ephemeral=True,
         )
 
-    async def on_timeout(self):
-        for child in self.children:
-            child.disabled = True
-        if self.message is not None:
-            try:
-                embed = self.create_dashboard_embed()
-                embed.set_footer(text="This calculator session expired • Run /total to reopen it")
-                await self.message.edit(embed=embed, view=self)
-            except discord.HTTPException:
-                pass
-
 
 # -------------------------------
 # 🚀 BOT READY
 # -------------------------------
 @bot.event
 async def on_ready():
-    synced = await bot.tree.sync()
     print(f"✅ Logged in as {bot.user}")
-    print(f"🔁 Synced {len(synced)} slash commands")
+    if SHARDED:
+        print(f"🧩 Running shards {bot.shard_ids} of {bot.shard_count}")
+    if bot.syncs_commands:
+        synced = await bot.tree.sync()
+        print(f"🔁 Synced {len(synced)} slash commands")
+
+
+# -------------------------------
+# ⌨️ ITEM NAME AUTOCOMPLETE
+# -------------------------------
+@timed("trader_autocomplete_seconds")
+async def item_name_autocomplete(interaction: discord.Interaction, current: str):
+    items = await load_items_async(interaction.guild_id)
+    return [
+        app_commands.Choice(name=name.title()[:100], value=name[:100])
+        for name in search_index(items).complete(current, limit=25)
+    ]
 
 
 # -------------------------------
 # 🧮 ADD ITEM
 # -------------------------------
 @bot.tree.command(name="additem", description="Add a new item (Role restricted)")
-async def additem(interaction: discord.Interaction, name: str, buy_price: float, sell_price: float):
-    if not has_bot_role(interaction.user):
-        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-        return
+@app_commands.describe(aliases="Comma-separated shorthands players may type, e.g. ak, kalash")
+@app_commands.choices(category=[app_commands.Choice(name=category, value=category) for category in CATEGORY_ORDER])
+@bot_role_required()
+@timed("trader_command_seconds", command="additem")
+async def additem(
+    interaction: discord.Interaction,
+    name: str,
+    buy_price: float,
+    sell_price: float,
+    category: app_commands.Choice[str] | None = None,
+    aliases: str | None = None,
+):
     if buy_price < 0 or sell_price < 0:
         await interaction.response.send_message("⚠️ Prices must be non-negative.", ephemeral=True)
         return
-    items = load_items()
+    items = await load_items_async(interaction.guild_id)
     name = name.lower()
     if name in items:
         await interaction.response.send_message(f"⚠️ {name.title()} already exists.", ephemeral=True)
         return
-    items[name] = {"buy": buy_price, "sell": sell_price}
-    save_items(items)
+    if aliases is not None:
+        aliases = normalize_aliases(aliases, name)
+        conflicts = alias_conflicts(items, name, aliases)
+        if conflicts:
+            await interaction.response.send_message(conflict_text(conflicts), ephemeral=True)
+            return
+    items = (await catalog_for_async(interaction.guild_id)).set_item(
+        name, buy_price, sell_price, category.value if category else None, aliases
+    )
+    also = f" • aka {', '.join(items[name]['aliases'])}" if items[name]["aliases"] else ""
     await interaction.response.send_message(
-        f"✅ Added {name.title()} (Buy: ${buy_price:,.2f}, Sell: ${sell_price:,.2f})",
+        f"✅ Added {name.title()} to {items[name]['category']} (Buy: ${buy_price:,.2f}, Sell: ${sell_price:,.2f}){also}",
         ephemeral=False,
     )
 
@@ -895,30 +2831,369 @@ async def additem(interaction: discord.Interaction, name: str, buy_price: float,
 # 🗑️ REMOVE ITEM
 # -------------------------------
 @bot.tree.command(name="removeitem", description="Remove an item (Role restricted)")
+@app_commands.autocomplete(name=item_name_autocomplete)
+@bot_role_required()
+@timed("trader_command_seconds", command="removeitem")
 async def removeitem(interaction: discord.Interaction, name: str):
-    if not has_bot_role(interaction.user):
-        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-        return
-    items = load_items()
+    items = await load_items_async(interaction.guild_id)
     name = name.lower()
     if name not in items:
         await interaction.response.send_message(f"❌ {name.title()} not found.", ephemeral=True)
         return
-    del items[name]
-    save_items(items)
+    (await catalog_for_async(interaction.guild_id)).remove_item(name)
     await interaction.response.send_message(f"🗑️ Removed {name.title()}", ephemeral=False)
 
 
+# -------------------------------
+# ✏️ UPDATE ITEM
+# -------------------------------
+async def update_item(
+    interaction: discord.Interaction, name: str, buy_price=None, sell_price=None, category=None, aliases=None
+):
+    if buy_price is None and sell_price is None and category is None and aliases is None:
+        await interaction.response.send_message("⚠️ Give a new buy price, sell price, category or aliases.", ephemeral=True)
+        return
+    if (buy_price is not None and buy_price < 0) or (sell_price is not None and sell_price < 0):
+        await interaction.response.send_message("⚠️ Prices must be non-negative.", ephemeral=True)
+        return
+    items = await load_items_async(interaction.guild_id)
+    name = name.lower()
+    current = items.get(name)
+    if current is None:
+        await interaction.response.send_message(f"❌ {name.title()} not found. Use `/additem` to add it.", ephemeral=True)
+        return
+    if aliases is not None:
+        # "none" clears the list; anything else replaces it.
+        aliases = [] if aliases.strip().lower() == "none" else normalize_aliases(aliases, name)
+        conflicts = alias_conflicts(items, name, aliases)
+        if conflicts:
+            await interaction.response.send_message(conflict_text(conflicts), ephemeral=True)
+            return
+
+    entry = {
+        "buy": current["buy"] if buy_price is None else buy_price,
+        "sell": current["sell"] if sell_price is None else sell_price,
+        "category": current["category"] if category is None else category,
+        "aliases": current["aliases"] if aliases is None else aliases,
+    }
+    if entry == current:
+        await interaction.response.send_message(f"✅ {name.title()} already has those values.", ephemeral=True)
+        return
+
+    items = (await catalog_for_async(interaction.guild_id)).update_items({name: entry})
+    render_cache.rekey(items)
+    changes = []
+    if entry["buy"] != current["buy"]:
+        changes.append(f"Buy: ${current['buy']:,.2f} → ${entry['buy']:,.2f}")
+    if entry["sell"] != current["sell"]:
+        changes.append(f"Sell: ${current['sell']:,.2f} → ${entry['sell']:,.2f}")
+    if entry["category"] != current["category"]:
+        changes.append(f"Category: {current['category']} → {entry['category']}")
+    if entry["aliases"] != current["aliases"]:
+        changes.append(f"Aliases: {', '.join(entry['aliases']) or 'none'}")
+    await interaction.response.send_message(f"✏️ Updated {name.title()} ({', '.join(changes)})", ephemeral=False)
+
+
+@bot.tree.command(name="setprice", description="Change an item's buy and/or sell price (Role restricted)")
+@app_commands.autocomplete(item_name=item_name_autocomplete)
+@bot_role_required()
+@timed("trader_command_seconds", command="setprice")
+async def setprice(
+    interaction: discord.Interaction,
+    item_name: str,
+    buy_price: float | None = None,
+    sell_price: float | None = None,
+):
+    await update_item(interaction, item_name, buy_price, sell_price)
+
+
+@bot.tree.command(name="updateitem", description="Change an item's prices, category or aliases (Role restricted)")
+@app_commands.describe(aliases="Comma-separated shorthands that replace the current ones, or 'none' to clear them")
+@app_commands.autocomplete(name=item_name_autocomplete)
+@app_commands.choices(category=[app_commands.Choice(name=category, value=category) for category in CATEGORY_ORDER])
+@bot_role_required()
+@timed("trader_command_seconds", command="updateitem")
+async def updateitem(
+    interaction: discord.Interaction,
+    name: str,
+    buy_price: float | None = None,
+    sell_price: float | None = None,
+    category: app_commands.Choice[str] | None = None,
+    aliases: str | None = None,
+):
+    await update_item(interaction, name, buy_price, sell_price, category.value if category else None, aliases)
+
+
+# -------------------------------
+# 📥 PRICE IMPORT / EXPORT
+# -------------------------------
+PRICE_COLUMNS = ("name", "buy", "sell", "category", "aliases")
+
+
+class PriceFileError(ValueError):
+    pass
+
+
+def parse_price(value, field, where):
+    try:
+        number = float(str(value).strip().replace(",", "").lstrip("$"))
+    except ValueError:
+        raise PriceFileError(f"{where}: {field} {value!r} is not a number") from None
+    if not math.isfinite(number) or number < 0:
+        raise PriceFileError(f"{where}: {field} must be a non-negative number")
+    return number
+
+
+def price_row(name, buy, sell, category, aliases, where):
+    name = str(name or "").strip().lower()
+    if not name:
+        raise PriceFileError(f"{where}: missing item name")
+    category = str(category or "").strip()
+    if category and category.lower() not in CATEGORY_LOOKUP:
+        raise PriceFileError(f"{where}: unknown category {category!r}")
+    if aliases is not None and not isinstance(aliases, (str, list)):
+        raise PriceFileError(f"{where}: aliases must be text or a list")
+    return name, {
+        "buy": parse_price(buy, "buy", where),
+        "sell": parse_price(sell, "sell", where),
+        "category": CATEGORY_LOOKUP[category.lower()] if category else None,
+        # None keeps the item's current aliases.
+        "aliases": None if aliases is None else normalize_aliases(aliases, name),
+    }
+
+
+def iter_csv_rows(stream):
+    """Yield (where, name, buy, sell, category, aliases) per CSV row, read one line at a time."""
+    reader = csv.reader(stream)
+    header = [column.strip().lower() for column in next(reader, [])]
+    missing = [column for column in PRICE_COLUMNS[:3] if column not in header]
+    if missing:
+        raise PriceFileError(f"the CSV header needs name, buy and sell columns (missing {', '.join(missing)})")
+    index = {column: header.index(column) for column in PRICE_COLUMNS if column in header}
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        cells = {column: row[position] if position < len(row) else "" for column, position in index.items()}
+        yield f"line {reader.line_num}", cells["name"], cells["buy"], cells["sell"], cells.get("category"), cells.get("aliases")
+
+
+def iter_json_rows(stream):
+    """Yield (where, name, buy, sell, category, aliases) from an items.json-style object or a list of rows."""
+    try:
+        data = json.load(stream)
+    except ValueError as exc:
+        raise PriceFileError(f"invalid JSON: {exc}") from None
+    if isinstance(data, dict):
+        entries = data.items()
+    elif isinstance(data, list):
+        entries = ((row.get("name") if isinstance(row, dict) else None, row) for row in data)
+    else:
+        raise PriceFileError("the JSON must be an object of items or a list of rows")
+    for position, (name, value) in enumerate(entries, start=1):
+        if not isinstance(value, dict):
+            value = {"buy": value, "sell": 0}
+        yield f"item {position}", name, value.get("buy"), value.get("sell"), value.get("category"), value.get("aliases")
+
+
+def read_price_file(data: bytes, filename: str, max_errors=10):
+    """Validate an uploaded price file row by row into ({name: entry}, [errors])."""
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+    rows_of = iter_json_rows if filename.lower().endswith(".json") else iter_csv_rows
+    rows, errors = {}, []
+    try:
+        for where, name, buy, sell, category, aliases in rows_of(stream):
+            try:
+                name, entry = price_row(name, buy, sell, category, aliases, where)
+            except PriceFileError as exc:
+                errors.append(str(exc))
+            else:
+                if name in rows:
+                    errors.append(f"{where}: {name!r} is listed more than once")
+                rows[name] = entry
+            if len(errors) >= max_errors:
+                errors.append("…stopped after too many problems")
+                break
+    except PriceFileError as exc:
+        errors.append(str(exc))
+    except UnicodeDecodeError:
+        errors.append("the file is not UTF-8 text")
+    except csv.Error as exc:
+        errors.append(f"unreadable CSV: {exc}")
+    return rows, errors
+
+
+def diff_prices(items, rows, remove_missing=False):
+    """Compare parsed rows with the catalog: (updates, removed, changed lines, unchanged count)."""
+    updates, lines, unchanged = {}, {"added": [], "changed": [], "removed": []}, 0
+    for name, entry in sorted(rows.items()):
+        current = items.get(name)
+        category = entry["category"] or (current["category"] if current else None)
+        aliases = entry["aliases"] if entry["aliases"] is not None else (current["aliases"] if current else None)
+        new = {
+            "buy": entry["buy"],
+            "sell": entry["sell"],
+            "category": normalize_category(category, name),
+            "aliases": normalize_aliases(aliases, name),
+        }
+        if current is None:
+            lines["added"].append(f"➕ **{name.title()}** ${new['buy']:,.2f} / ${new['sell']:,.2f}")
+        elif current == new:
+            unchanged += 1
+            continue
+        else:
+            change = f"${current['buy']:,.2f} / ${current['sell']:,.2f} → ${new['buy']:,.2f} / ${new['sell']:,.2f}"
+            if current["category"] != new["category"]:
+                change += f" • {current['category']} → {new['category']}"
+            if current["aliases"] != new["aliases"]:
+                change += f" • aka {', '.join(new['aliases']) or 'nothing'}"
+            lines["changed"].append(f"✏️ **{name.title()}** {change}")
+        updates[name] = new
+    removed = sorted(set(items) - set(rows)) if remove_missing else []
+    lines["removed"] = [f"🗑️ **{name.title()}**" for name in removed]
+    return updates, removed, lines, unchanged
+
+
+def price_diff_embed(title, lines, unchanged, color):
+    embed = discord.Embed(
+        title=title,
+        description=(
+            f"➕ {len(lines['added'])} added • ✏️ {len(lines['changed'])} changed • "
+            f"🗑️ {len(lines['removed'])} removed • {unchanged} unchanged"
+        ),
+        color=color,
+    )
+    for key, label in (("added", "Added"), ("changed", "Changed"), ("removed", "Removed")):
+        shown = chunk_lines(lines[key], max_chars=1000, max_chunks=1)
+        if shown:
+            more = len(lines[key]) - (shown[0].count("\n") + 1)
+            embed.add_field(name=label + (f" (+{more} more)" if more > 0 else ""), value=shown[0], inline=False)
+    return embed
+
+
+def export_prices(items, fmt):
+    if fmt == "json":
+        return json.dumps(dict(sorted(items.items())), indent=4).encode("utf-8")
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(PRICE_COLUMNS)
+    for name in sorted(items):
+        data = items[name]
+        writer.writerow([name, repr(data["buy"]), repr(data["sell"]), data["category"], "; ".join(data["aliases"])])
+    return out.getvalue().encode("utf-8")
+
+
+class ConfirmImportView(discord.ui.View):
+    def __init__(self, owner_id, guild_id, version, rows, remove_missing, updates, removed, embed):
+        super().__init__(timeout=300)
+        self.owner_id = owner_id
+        self.guild_id = guild_id
+        self.version = version
+        self.rows = rows
+        self.remove_missing = remove_missing
+        self.updates = updates
+        self.removed = removed
+        self.embed = embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Only the admin who uploaded the file can apply it.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="✅ Apply", style=discord.ButtonStyle.success)
+    @timed("trader_view_callback_seconds", callback="ConfirmImportView.apply")
+    async def apply(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        items = await load_items_async(self.guild_id)
+        stale = items.version != self.version
+        if stale and diff_prices(items, self.rows, self.remove_missing)[:2] != (self.updates, self.removed):
+            await interaction.response.edit_message(
+                content="⚠️ The shop changed since this preview. Nothing was applied; run /importprices again.",
+                embed=None,
+                view=None,
+            )
+            return
+        items = (await catalog_for_async(self.guild_id)).update_items(self.updates, self.removed)
+        render_cache.rekey(items)
+        self.embed.title = "📥 Price Import Applied"
+        self.embed.color = discord.Color.green()
+        await interaction.response.edit_message(embed=self.embed, view=None)
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    @timed("trader_view_callback_seconds", callback="ConfirmImportView.cancel")
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.response.edit_message(content="✅ Import cancelled. Nothing was changed.", embed=None, view=None)
+
+
+@bot.tree.command(name="importprices", description="Bulk update prices from a CSV or JSON file (Role restricted)")
+@app_commands.describe(
+    file="CSV with name,buy,sell[,category,aliases] columns, or JSON like /exportprices",
+    remove_missing="Also remove shop items that are not in the file",
+)
+@bot_role_required()
+@timed("trader_command_seconds", command="importprices")
+async def importprices(interaction: discord.Interaction, file: discord.Attachment, remove_missing: bool = False):
+    if file.size > IMPORT_MAX_BYTES:
+        await interaction.response.send_message(
+            f"⚠️ That file is too large (limit {IMPORT_MAX_BYTES // 1000} KB).", ephemeral=True
+        )
+        return
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    data = await file.read()
+    rows, errors = await run_storage(read_price_file, data, file.filename)
+    if errors:
+        await interaction.followup.send(
+            "❌ Nothing was imported. Please fix these problems:\n" + "\n".join(f"• {error}" for error in errors),
+            ephemeral=True,
+        )
+        return
+    if not rows:
+        await interaction.followup.send("⚠️ The file has no items.", ephemeral=True)
+        return
+
+    items = await load_items_async(interaction.guild_id)
+    updates, removed, lines, unchanged = diff_prices(items, rows, remove_missing)
+    if not updates and not removed:
+        await interaction.followup.send(f"✅ All {unchanged} item(s) already match the shop.", ephemeral=True)
+        return
+    embed = price_diff_embed("📥 Price Import Preview", lines, unchanged, discord.Color.orange())
+    embed.set_footer(text="Nothing is saved until you press Apply")
+    view = ConfirmImportView(
+        interaction.user.id, interaction.guild_id, items.version, rows, remove_missing, updates, removed, embed.copy()
+    )
+    await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+
+
+@bot.tree.command(name="exportprices", description="Download the shop prices as CSV or JSON (Role restricted)")
+@app_commands.rename(file_format="format")
+@app_commands.choices(file_format=[app_commands.Choice(name="CSV", value="csv"), app_commands.Choice(name="JSON", value="json")])
+@bot_role_required()
+@timed("trader_command_seconds", command="exportprices")
+async def exportprices(interaction: discord.Interaction, file_format: app_commands.Choice[str] | None = None):
+    fmt = file_format.value if file_format else "csv"
+    items = await load_items_async(interaction.guild_id)
+    data = await run_storage(export_prices, items, fmt)
+    await interaction.response.send_message(
+        f"📤 Exported {len(items)} item(s).",
+        file=discord.File(io.BytesIO(data), filename=f"prices.{fmt}"),
+        ephemeral=True,
+    )
+
+
 # -------------------------------
 # 💲 PRICE COMMAND
 # -------------------------------
 @bot.tree.command(name="price", description="Check the buy/sell price of an item")
+@app_commands.autocomplete(item_name=item_name_autocomplete)
+@timed("trader_command_seconds", command="price")
 async def price(interaction: discord.Interaction, item_name: str):
-    items = load_items()
+    items = await load_items_async(interaction.guild_id)
     item_name = item_name.lower()
-    if item_name in items:
-        data = items[item_name]
-        embed = discord.Embed(title=item_name.title(), color=discord.Color.green())
+    name = resolve_item(items, item_name)
+    if name is not None:
+        data = items[name]
+        embed = discord.Embed(title=name.title(), color=discord.Color.green())
         embed.add_field(name="Buy", value=f"${data['buy']:,.2f}")
         embed.add_field(name="Sell", value=f"${data['sell']:,.2f}")
         await interaction.response.send_message(embed=embed)
@@ -938,22 +3213,25 @@ async def price(interaction: discord.Interaction, item_name: str):
 # 🧮 CALCULATOR COMMANDS
 # -------------------------------
 async def open_calculator(interaction: discord.Interaction):
-    items = load_items()
+    items = await load_items_async(interaction.guild_id)
     if not items:
         await interaction.response.send_message("⚠️ The shop is empty.", ephemeral=False)
         return
 
-    view = TotalView(interaction.user)
+    await sessions.prefetch(session_key(interaction.user.id, interaction.guild_id))
+    view = TotalView(interaction.user, interaction.guild_id)
     await interaction.response.send_message(embed=view.create_dashboard_embed(), view=view, ephemeral=False)
     view.message = await interaction.original_response()
 
 
 @bot.tree.command(name="total", description="Open the shop calculator")
+@timed("trader_command_seconds", command="total")
 async def total(interaction: discord.Interaction):
     await open_calculator(interaction)
 
 
 @bot.tree.command(name="calculator", description="Open the easy shop calculator")
+@timed("trader_command_seconds", command="calculator")
 async def calculator(interaction: discord.Interaction):
     await open_calculator(interaction)
 
@@ -962,8 +3240,10 @@ async def calculator(interaction: discord.Interaction):
 # 🔎 SEARCH COMMAND (kept for compatibility)
 # -------------------------------
 @bot.tree.command(name="search", description="Search for items in the shop by name")
+@app_commands.autocomplete(query=item_name_autocomplete)
+@timed("trader_command_seconds", command="search")
 async def search(interaction: discord.Interaction, query: str):
-    items = load_items()
+    items = await load_items_async(interaction.guild_id)
     matches = find_item_matches(items, query, limit=25)
 
     if not matches:
@@ -998,11 +3278,35 @@ async def sync(ctx):
     await ctx.send(f"✅ Synced {len(synced)} global slash commands.")
 
 
+@bot.tree.command(name="sync", description="Sync slash commands (Administrators)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+@timed("trader_command_seconds", command="sync")
+async def sync_commands(interaction: discord.Interaction):
+    if not interaction.permissions.administrator:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    # Syncing can take longer than the 3 second reply window.
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    synced = await bot.tree.sync()
+    await interaction.followup.send(f"✅ Synced {len(synced)} global slash commands.", ephemeral=True)
+
+
 # -------------------------------
 # 🚀 RUN BOT WITH KEEP ALIVE
 # -------------------------------
-if not TOKEN:
-    print("❌ ERROR: Discord token not found in .env")
-else:
-    keep_alive()
+def main():
+    if not TOKEN:
+        print("❌ ERROR: Discord token not found in .env")
+        return
+    # Treat SIGTERM (launcher, process managers) like Ctrl+C so close() flushes.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    if HEALTH_SERVER == "flask":
+        from keep_alive import keep_alive
+
+        keep_alive(metrics.render)
     bot.run(TOKEN)
+
+
+if __name__ == "__main__":
+    main()
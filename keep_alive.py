@@ -1,19 +1,29 @@
 # keep_alive.py
-from flask import Flask
+from flask import Flask, Response
 from threading import Thread
 
 # Create a simple Flask web app
 app = Flask('')
+render_metrics = None
 
 @app.route('/')
 def home():
     return "✅ The Discord Shop Bot is running!"
 
+@app.route('/metrics')
+def metrics():
+    if render_metrics is None:
+        return Response("", mimetype="text/plain; version=0.0.4")
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
 # Function to start the web server
 def run():
     app.run(host='0.0.0.0', port=8080)
 
 # Function to launch it in a background thread
-def keep_alive():
+# (pass bot.metrics.render to serve /metrics)
+def keep_alive(metrics_renderer=None):
+    global render_metrics
+    render_metrics = metrics_renderer
     t = Thread(target=run)
     t.start()
\ No newline at end of file
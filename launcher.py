@@ -0,0 +1,178 @@
+# launcher.py
+# Runs the bot as several worker processes, each owning a contiguous range of
+# shards (SHARD_COUNT / SHARD_IDS) and its own health server port (PORT + n).
+# Crashed workers are restarted with backoff; a worker that exits cleanly (code 0)
+# is treated as stopped on purpose and stays down. Ctrl+C / SIGTERM stops them all.
+#
+#   python launcher.py                       # shard count from Discord, one worker per core
+#   python launcher.py --shards 8 --workers 4
+#
+# Workers share items.json (locked and merged per write), the SQLite stores,
+# and route each guild to one process, so carts stay in one place.
+import argparse
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_SCRIPT = os.path.join(BASE_DIR, "bot.py")
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+IDENTIFY_INTERVAL = 5.0
+MAX_BACKOFF = 60.0
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s launcher: %(message)s")
+
+
+def recommended_sharding(token):
+    """(shard count, identify max_concurrency) as recommended by Discord."""
+    request = urllib.request.Request(
+        GATEWAY_URL,
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (traderbot launcher, 1.0)"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        data = json.load(response)
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def split_shards(shard_count, workers):
+    """Contiguous, near-equal shard ranges, one per worker."""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class Worker:
+    def __init__(self, index, shard_ids, shard_count, port):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.port = port
+        self.process = None
+        self.restarts = 0
+        self.backoff = 1.0
+        self.restart_at = None
+        self.started_at = None
+        self.stopped = False
+
+    def start(self):
+        env = dict(
+            os.environ,
+            SHARDED="1",
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=",".join(map(str, self.shard_ids)),
+            PORT=str(self.port),
+        )
+        self.process = subprocess.Popen([sys.executable, BOT_SCRIPT], cwd=BASE_DIR, env=env)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        logging.info("Worker %d (pid %d) started for shards %s on port %d",
+                     self.index, self.process.pid, self.shard_ids, self.port)
+
+    def poll(self):
+        """Restart the worker with exponential backoff if it crashed; a clean exit leaves it stopped."""
+        if self.stopped:
+            return
+        now = time.monotonic()
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.restarts += 1
+                self.start()
+            return
+        code = self.process.poll()
+        if code is None:
+            # A worker that stayed up for a while earns a fresh backoff.
+            if now - self.started_at > MAX_BACKOFF:
+                self.backoff = 1.0
+            return
+        if code == 0:
+            logging.info("Worker %d exited cleanly, not restarting", self.index)
+            self.stopped = True
+            return
+        logging.warning("Worker %d exited with code %s, restarting in %.0fs", self.index, code, self.backoff)
+        self.restart_at = now + self.backoff
+        self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+def main():
+    load_dotenv(os.path.join(BASE_DIR, ".env"))
+    parser = argparse.ArgumentParser(description="Run the trader bot as sharded worker processes.")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("SHARD_COUNT") or 0),
+                        help="total shard count (default: SHARD_COUNT or Discord's recommendation)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes to spawn")
+    parser.add_argument("--base-port", type=int, default=int(os.getenv("PORT", "8080")),
+                        help="health server port of worker 0; worker n uses base + n")
+    args = parser.parse_args()
+
+    max_concurrency = 1
+    shard_count = args.shards
+    if not shard_count:
+        token = os.getenv("DISCORD_TOKEN")
+        if not token:
+            print("❌ ERROR: Discord token not found in .env")
+            return 1
+        shard_count, max_concurrency = recommended_sharding(token)
+        logging.info("Discord recommends %d shard(s), identify concurrency %d", shard_count, max_concurrency)
+
+    workers = [
+        Worker(index, shard_ids, shard_count, args.base_port + index)
+        for index, shard_ids in enumerate(split_shards(shard_count, args.workers))
+    ]
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Each worker identifies its shards one per IDENTIFY_INTERVAL; start the
+    # next worker once the previous ones are through, so they don't collide.
+    for worker in workers:
+        if stopping:
+            break
+        worker.start()
+        deadline = time.monotonic() + len(worker.shard_ids) * IDENTIFY_INTERVAL / max_concurrency
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(0.5)
+
+    while not stopping:
+        for worker in workers:
+            worker.poll()
+        if all(worker.stopped for worker in workers):
+            logging.info("All workers exited cleanly")
+            break
+        time.sleep(1.0)
+
+    logging.info("Stopping %d worker(s)", len(workers))
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        if worker.process is None:
+            continue
+        try:
+            worker.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
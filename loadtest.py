@@ -0,0 +1,577 @@
+# loadtest.py
+# Simulates many users driving the calculator at once, without Discord.
+#
+# The real command and view callbacks run against fake interactions whose
+# responses and message edits go over HTTP to a local stand-in for Discord
+# (own thread, own loop) that adds response latency and answers 429 the way
+# Discord does. The report gives acknowledgement latency per action and how
+# many interactions missed Discord's 3 second deadline.
+#
+#   python loadtest.py --users 200 --items-per-cart 5
+#   python loadtest.py --users 500 --latency 0.15 --ack-429 0.01 --output load.json
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+import aiohttp
+import discord
+from aiohttp import web
+
+import bot
+
+ACK_DEADLINE = 3.0
+QUERIES = ("ak", "m4", "ammo", "battery", "mask", "tent", "vitamin", "rifle", "mag", "jacket")
+
+
+# -------------------------------
+# 🌐 FAKE DISCORD HTTP
+# -------------------------------
+class FakeDiscord:
+    """Local stand-in for the Discord endpoints the calculator uses.
+
+    Every request waits a gaussian `latency` before answering. Message edits
+    share a per-channel bucket (`edit_rate` per `edit_per` seconds) and all
+    non-interaction routes a global per-second bucket, both answered with
+    Discord-style 429 bodies. Interaction callbacks are exempt from rate limits
+    like on Discord, except for the optional random `ack_429` fraction.
+    """
+
+    def __init__(self, latency=0.08, jitter=0.03, edit_rate=5, edit_per=5.0, global_rate=50, ack_429=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.edit_rate = edit_rate
+        self.edit_per = edit_per
+        self.global_rate = global_rate
+        self.ack_429 = ack_429
+        self.rng = random.Random(seed)
+        self.requests = defaultdict(int)
+        self.rate_limited = defaultdict(int)
+        self._ids = itertools.count(10**17)
+        self._messages = {}
+        self._channel_edits = defaultdict(deque)
+        self._global = deque()
+        self._loop = None
+        self._runner = None
+        self._ready = threading.Event()
+        self.url = None
+
+    # ---- server lifecycle (runs in its own thread) ----
+    def start(self):
+        threading.Thread(target=self._serve, name="fake-discord", daemon=True).start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_post("/interactions/{interaction_id}/{token}/callback", self.callback)
+        app.router.add_get("/webhooks/{application_id}/{token}/messages/@original", self.original)
+        app.router.add_patch("/channels/{channel_id}/messages/{message_id}", self.edit)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        self._ready.set()
+        self._loop.run_forever()
+
+    # ---- behaviour ----
+    async def _respond_delay(self):
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+
+    def _too_many(self, route, retry_after, is_global=False):
+        self.rate_limited[f"{route} (global)" if is_global else route] += 1
+        return web.json_response(
+            {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": is_global},
+            status=429,
+        )
+
+    def _take(self, bucket, rate, per):
+        now = time.monotonic()
+        while bucket and now - bucket[0] >= per:
+            bucket.popleft()
+        if len(bucket) >= rate:
+            return per - (now - bucket[0])
+        bucket.append(now)
+        return 0.0
+
+    def _global_limit(self, route):
+        retry_after = self._take(self._global, self.global_rate, 1.0)
+        if retry_after:
+            return self._too_many(route, retry_after, is_global=True)
+        return None
+
+    async def callback(self, request):
+        self.requests["callback"] += 1
+        # Read the body before any 429, or the client sees a dropped connection.
+        payload = await request.json()
+        await self._respond_delay()
+        if self.ack_429 and self.rng.random() < self.ack_429:
+            return self._too_many("callback", self.rng.uniform(0.2, 1.5))
+        data = payload.get("data") or {}
+        if payload.get("type") == 4 and data:
+            token = request.match_info["token"]
+            self._messages[token] = {"id": str(next(self._ids)), "channel_id": data.pop("channel_id", "0")}
+        return web.Response(status=204)
+
+    async def original(self, request):
+        self.requests["original"] += 1
+        limited = self._global_limit("original")
+        if limited is not None:
+            return limited
+        await self._respond_delay()
+        message = self._messages.get(request.match_info["token"])
+        if message is None:
+            return web.json_response({"message": "Unknown Message", "code": 10008}, status=404)
+        return web.json_response(message)
+
+    async def edit(self, request):
+        self.requests["edit"] += 1
+        await request.read()
+        limited = self._global_limit("edit")
+        if limited is not None:
+            return limited
+        channel_id = request.match_info["channel_id"]
+        retry_after = self._take(self._channel_edits[channel_id], self.edit_rate, self.edit_per)
+        if retry_after:
+            return self._too_many("edit", retry_after)
+        await self._respond_delay()
+        return web.json_response({"id": request.match_info["message_id"], "channel_id": channel_id})
+
+
+# -------------------------------
+# 🎭 FAKE INTERACTIONS
+# -------------------------------
+class FakeHTTP:
+    """Minimal HTTP client that retries 429s the way discord.py's client does."""
+
+    def __init__(self, base_url, max_retries=10):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.retries = 0
+        self.session = None
+        self._global_until = 0.0
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(self.base_url, connector=aiohttp.TCPConnector(limit=0))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def request(self, method, path, payload=None):
+        for _ in range(self.max_retries):
+            # A global 429 holds back every request, not just the one that hit it.
+            wait = self._global_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with self.session.request(method, path, json=payload) as resp:
+                if resp.status == 429:
+                    body = await resp.json()
+                    self.retries += 1
+                    if body.get("global"):
+                        self._global_until = max(self._global_until, time.monotonic() + body["retry_after"])
+                    else:
+                        await asyncio.sleep(body["retry_after"])
+                    continue
+                if resp.status >= 400:
+                    raise RuntimeError(f"{method} {path} answered {resp.status}")
+                return await resp.json() if resp.status != 204 else None
+        raise discord.RateLimited(body["retry_after"])
+
+
+def message_payload(content=None, embed=None, view=None, ephemeral=False, **_):
+    # Serialise like discord.py does so the load includes that CPU cost.
+    payload = {"content": content, "flags": 64 if ephemeral else 0}
+    if embed is not None:
+        payload["embeds"] = [embed.to_dict()]
+    if view is not None:
+        payload["components"] = view.to_components()
+    return payload
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+
+class FakeMessage:
+    def __init__(self, http, channel_id, message_id, view=None):
+        self.http = http
+        self.channel = FakeChannel(channel_id)
+        self.id = message_id
+        # The view last rendered on this message, i.e. what a user can click.
+        self.view = view
+
+    async def edit(self, **kwargs):
+        await self.http.request("PATCH", f"/channels/{self.channel.id}/messages/{self.id}", message_payload(**kwargs))
+        if kwargs.get("view") is not None:
+            self.view = kwargs["view"]
+        return self
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.display_name = f"loadtest-{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.sent = None
+
+    def is_done(self):
+        return self.interaction.acked_at is not None
+
+    async def _ack(self, kind, payload):
+        if self.is_done():
+            raise discord.InteractionResponded(self.interaction)
+        it = self.interaction
+        await it.http.request("POST", f"/interactions/{it.id}/{it.token}/callback", {"type": kind, "data": payload})
+        it.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent = kwargs
+        payload = message_payload(content, **kwargs)
+        payload["channel_id"] = str(self.interaction.channel_id)
+        await self._ack(4, payload)
+
+    async def edit_message(self, content=None, **kwargs):
+        self.sent = kwargs
+        await self._ack(7, message_payload(content, **kwargs))
+        if self.interaction.message is not None and kwargs.get("view") is not None:
+            self.interaction.message.view = kwargs["view"]
+
+    async def send_modal(self, modal):
+        self.sent = {"modal": modal}
+        await self._ack(9, modal.to_dict())
+
+
+class FakeInteraction:
+    _ids = itertools.count(1)
+
+    def __init__(self, http, user, channel_id, message=None, data=None):
+        self.http = http
+        self.id = next(self._ids)
+        self.token = f"token-{self.id}"
+        self.user = user
+        self.channel_id = channel_id
+        self.guild_id = None
+        self.guild = None
+        self.message = message
+        self.data = data or {}
+        self.response = FakeResponse(self)
+        self.created_at = time.perf_counter()
+        self.acked_at = None
+
+    async def original_response(self):
+        data = await self.http.request("GET", f"/webhooks/0/{self.token}/messages/@original")
+        return FakeMessage(self.http, int(data["channel_id"]), int(data["id"]), (self.response.sent or {}).get("view"))
+
+
+# -------------------------------
+# 👥 SIMULATED USERS
+# -------------------------------
+class LoadTest:
+    def __init__(self, http, args):
+        self.http = http
+        self.args = args
+        self.latencies = defaultdict(list)
+        self.unanswered = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.completed_carts = 0
+
+    async def think(self, rng):
+        if self.args.think:
+            await asyncio.sleep(rng.uniform(0, self.args.think))
+
+    def record(self, action, interaction):
+        if interaction.acked_at is None:
+            self.unanswered[action] += 1
+        else:
+            self.latencies[action].append(interaction.acked_at - interaction.created_at)
+
+    async def interact(self, action, user, channel_id, component, callback, message=None, data=None):
+        interaction = FakeInteraction(self.http, user, channel_id, message, data)
+        try:
+            if await component.interaction_check(interaction):
+                await callback(interaction)
+        except discord.RateLimited:
+            self.errors[f"{action} (429)"] += 1
+        except Exception:
+            logging.exception("%s failed", action)
+            self.errors[action] += 1
+        self.record(action, interaction)
+        return interaction
+
+    async def click(self, action, user, channel_id, message):
+        """Press a dashboard button the way discord.py dispatches a dynamic item."""
+        custom_id = next(child.custom_id for child in message.view.children if child.action == action)
+        match = bot.CalculatorButton.__discord_ui_compiled_template__.fullmatch(custom_id)
+        button = await bot.CalculatorButton.from_custom_id(None, None, match)
+        name = f"TotalView.{bot.CALCULATOR_BUTTONS[action][3]}"
+        return await self.interact(name, user, channel_id, button, button.callback, message)
+
+    async def posted(self, interaction):
+        """The message an interaction's send_message created, with its view."""
+        sent = interaction.response.sent or {}
+        if "view" not in sent:
+            return None, None
+        try:
+            message = await interaction.original_response()
+        except (discord.RateLimited, RuntimeError):
+            self.errors["original_response"] += 1
+            return None, None
+        return message, sent["view"]
+
+    async def pick_item(self, user, channel_id, browser, message, rng):
+        options = browser.select_menu.options if browser.select_menu is not None else []
+        if not options:
+            return
+        browser.select_menu._values = [rng.choice(options).value]
+        await self.think(rng)
+        picked = await self.interact("ItemBrowserView.select", user, channel_id, browser, browser.select_menu.callback, message)
+        modal = (picked.response.sent or {}).get("modal")
+        if modal is None:
+            return
+        modal.quantity._value = str(rng.randint(1, 20))
+        await self.think(rng)
+        await self.interact("QuantityModal.submit", user, channel_id, modal, modal.on_submit, message)
+
+    async def add_by_search(self, user, channel_id, message, rng):
+        opened = await self.click("search", user, channel_id, message)
+        modal = (opened.response.sent or {}).get("modal")
+        if modal is None:
+            return
+        modal.query._value = rng.choice(QUERIES)
+        await self.think(rng)
+        submitted = await self.interact("SearchItemModal.submit", user, channel_id, modal, modal.on_submit, message)
+        results, browser = await self.posted(submitted)
+        if browser is not None:
+            await self.pick_item(user, channel_id, browser, results, rng)
+
+    async def add_by_category(self, user, channel_id, message, rng):
+        opened = await self.click("categories", user, channel_id, message)
+        picker_message, picker = await self.posted(opened)
+        if picker is None:
+            return
+        await self.think(rng)
+        category = rng.choice(list(picker.categories))
+        chosen = await self.interact(
+            "CategoryView.select", user, channel_id, picker, picker.children[0].callback, picker_message,
+            data={"values": [category]},
+        )
+        browser = (chosen.response.sent or {}).get("view")
+        if browser is not None:
+            await self.pick_item(user, channel_id, browser, picker_message, rng)
+
+    async def add_by_browsing(self, user, channel_id, message, rng):
+        opened = await self.click("browse", user, channel_id, message)
+        browser_message, browser = await self.posted(opened)
+        if browser is None:
+            return
+        for _ in range(rng.randint(0, 3)):
+            await self.think(rng)
+            await self.interact("ItemBrowserView.next", user, channel_id, browser, browser.next_button.callback, browser_message)
+        await self.pick_item(user, channel_id, browser, browser_message, rng)
+
+    async def add_in_bulk(self, user, channel_id, message, rng):
+        """Fill the whole cart from one browser page with a single bulk modal."""
+        opened = await self.click("browse", user, channel_id, message)
+        browser_message, browser = await self.posted(opened)
+        if browser is None:
+            return
+        await self.think(rng)
+        await self.interact("ItemBrowserView.bulk", user, channel_id, browser, browser.bulk_button.callback, browser_message)
+        options = browser.select_menu.options if browser.select_menu is not None else []
+        if not options:
+            return
+        picks = rng.sample(options, min(self.args.items_per_cart, len(options)))
+        browser.select_menu._values = [option.value for option in picks]
+        await self.think(rng)
+        picked = await self.interact("ItemBrowserView.select", user, channel_id, browser, browser.select_menu.callback, browser_message)
+        modal = (picked.response.sent or {}).get("modal")
+        if modal is None:
+            return
+        modal.quantities._value = "\n".join(f"{option.value} = {rng.randint(1, 20)}" for option in picks)
+        await self.think(rng)
+        await self.interact("BulkQuantityModal.submit", user, channel_id, modal, modal.on_submit, browser_message)
+
+    async def user_session(self, index):
+        rng = random.Random(self.args.seed + index)
+        user = FakeUser(10**6 + index)
+        channel_id = 1000 + index % self.args.channels
+        await asyncio.sleep(rng.uniform(0, self.args.ramp))
+
+        opened = FakeInteraction(self.http, user, channel_id)
+        try:
+            await bot.total.callback(opened)
+        except discord.RateLimited:
+            self.errors["/total (429)"] += 1
+        except Exception:
+            logging.exception("/total failed")
+            self.errors["/total"] += 1
+        self.record("/total", opened)
+        main_view = (opened.response.sent or {}).get("view")
+        if main_view is None or main_view.message is None:
+            return
+        message = main_view.message
+
+        await self.think(rng)
+        await self.click("buy" if rng.random() < 0.7 else "sell", user, channel_id, message)
+
+        if self.args.bulk:
+            await self.think(rng)
+            await self.add_in_bulk(user, channel_id, message, rng)
+        else:
+            flows = (self.add_by_search, self.add_by_category, self.add_by_browsing)
+            for _ in range(self.args.items_per_cart):
+                await self.think(rng)
+                await rng.choice(flows)(user, channel_id, message, rng)
+
+        if rng.random() < 0.5:
+            await self.think(rng)
+            await self.click("cart", user, channel_id, message)
+        await self.think(rng)
+        await self.click("calculate", user, channel_id, message)
+        self.completed_carts += 1
+
+
+# -------------------------------
+# 📊 REPORT
+# -------------------------------
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(values, unanswered=0):
+    misses = sum(1 for value in values if value > ACK_DEADLINE) + unanswered
+    summary = {"count": len(values) + unanswered, "deadline_misses": misses}
+    if values:
+        summary.update({
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        })
+    return summary
+
+
+def print_report(report):
+    print(f"\n{'action':<28} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'>3s':>5}")
+    rows = list(report["actions"].items()) + [("ALL", report["overall"])]
+    for action, row in rows:
+        print(
+            f"{action:<28} {row['count']:>6} {row.get('p50_ms', 0):>8.1f} {row.get('p95_ms', 0):>8.1f} "
+            f"{row.get('p99_ms', 0):>8.1f} {row.get('max_ms', 0):>8.1f} {row['deadline_misses']:>5}"
+        )
+    print(f"\nCompleted carts: {report['completed_carts']}/{report['users']} in {report['elapsed_s']}s")
+    print(f"Errors: {report['errors'] or 'none'}")
+    print(f"Fake Discord requests: {report['discord']['requests']} • 429s: {report['discord']['rate_limited']}")
+    print(f"Client 429 retries: {report['client_retries']} • edit scheduler: {report['edit_scheduler']}")
+    print(f"Event loop max lag: {report['max_loop_lag_ms']} ms")
+
+
+async def run(args, fake):
+    bot.loop_monitor.start()
+    started = time.perf_counter()
+    async with FakeHTTP(fake.url) as http:
+        test = LoadTest(http, args)
+        await asyncio.gather(*(test.user_session(index) for index in range(args.users)))
+        # Let coalesced dashboard edits drain, including ones already in flight,
+        # before the HTTP session closes.
+        tasks = list(bot.edit_scheduler._tasks.values())
+        if tasks:
+            _, unfinished = await asyncio.wait(tasks, timeout=args.drain)
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    bot.loop_monitor.stop()
+
+    everything = [value for values in test.latencies.values() for value in values]
+    return {
+        "users": args.users,
+        "items_per_cart": args.items_per_cart,
+        "elapsed_s": round(elapsed, 2),
+        "completed_carts": test.completed_carts,
+        "actions": {
+            action: summarize(test.latencies[action], test.unanswered[action])
+            for action in sorted(set(test.latencies) | set(test.unanswered))
+        },
+        "overall": summarize(everything, sum(test.unanswered.values())),
+        "errors": dict(test.errors),
+        "discord": {"requests": dict(fake.requests), "rate_limited": dict(fake.rate_limited)},
+        "client_retries": http.retries,
+        "edit_scheduler": bot.edit_scheduler.stats(),
+        "max_loop_lag_ms": round(bot.loop_monitor.max_lag * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent calculator users against a fake Discord.")
+    parser.add_argument("--users", type=int, default=100, help="concurrent simulated users")
+    parser.add_argument("--items-per-cart", type=int, default=5, help="items each user adds before calculating")
+    parser.add_argument("--channels", type=int, default=10, help="channels the users are spread over")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which users arrive")
+    parser.add_argument("--think", type=float, default=0.5, help="max seconds a user waits between actions")
+    parser.add_argument("--latency", type=float, default=0.08, help="mean fake Discord response time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.03, help="standard deviation of the response time")
+    parser.add_argument("--global-rate", type=int, default=50, help="global requests per second before 429")
+    parser.add_argument("--ack-429", type=float, default=0.0, help="fraction of interaction callbacks answered 429")
+    parser.add_argument("--items", type=int, help="use a synthetic catalog of this many items instead of items.json")
+    parser.add_argument("--bulk", action="store_true", help="fill each cart with one bulk-add modal instead of item by item")
+    parser.add_argument("--drain", type=float, default=15.0, help="max seconds to wait for queued edits at the end")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the report as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    fake = FakeDiscord(
+        latency=args.latency,
+        jitter=args.jitter,
+        global_rate=args.global_rate,
+        ack_429=args.ack_429,
+        seed=args.seed,
+    ).start()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            if args.items:
+                from bench import make_catalog
+
+                path = os.path.join(workdir, "items.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(make_catalog(args.items, args.seed), f)
+                bot.catalog = bot.Catalog(bot.JsonCatalogStore(path))
+            report = asyncio.run(run(args, fake))
+    finally:
+        fake.stop()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()